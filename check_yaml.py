@@ -6,14 +6,15 @@ YAML 語法檢查工具
 import yaml
 import sys
 
+# 優先使用 libyaml 的 C 實作解析器，不可用時退回純 Python 版本
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 def check_yaml_syntax(file_path):
     try:
+        # 解析 YAML（直接由檔案串流讀取，避免先複製成字串）
         with open(file_path, "r", encoding="utf-8") as f:
-            content = f.read()
-
-        # 解析 YAML
-        data = yaml.safe_load(content)
+            data = yaml.load(f, Loader=Loader)
         print(f"✅ {file_path} YAML 語法正確")
 
         # 檢查基本結構
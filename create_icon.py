@@ -6,6 +6,11 @@ Generate a simple icon for the system monitor application
 from PIL import Image, ImageDraw
 import os
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 
 def create_icon():
     """Create a simple system monitor icon"""
@@ -60,23 +65,55 @@ def create_icon():
     chart_x = screen_rect[0] + 20
     chart_y = screen_rect[1] + 20
     # Draw some bars representing system metrics
-    for i in range(6):
-        bar_height = 20 + (i * 8) % 60
-        x = chart_x + i * bar_spacing
-        bar_y = chart_y + 80 - bar_height
-        draw.rectangle([x, bar_y, x + bar_width, chart_y + 80], fill=chart_color)
+    bar_heights = [20 + (i * 8) % 60 for i in range(6)]
+    if np is not None:
+        # Fill every bar into one RGBA array and paste it in a single call
+        chart_height = 81
+        chart_width = (len(bar_heights) - 1) * bar_spacing + bar_width + 1
+        chart = np.zeros((chart_height, chart_width, 4), dtype=np.uint8)
+        for i, bar_height in enumerate(bar_heights):
+            x = i * bar_spacing
+            chart[chart_height - 1 - bar_height :, x : x + bar_width + 1] = chart_color
+        chart_img = Image.fromarray(chart, "RGBA")
+        img.paste(chart_img, (chart_x, chart_y), chart_img)
+    else:
+        for i, bar_height in enumerate(bar_heights):
+            x = chart_x + i * bar_spacing
+            bar_y = chart_y + 80 - bar_height
+            draw.rectangle([x, bar_y, x + bar_width, chart_y + 80], fill=chart_color)
 
     # Save as ICO file with multiple sizes
     sizes = [16, 24, 32, 48, 64, 128, 256]
     images = []
 
+    # Build a power-of-two pyramid with cheap box reductions so that each
+    # Lanczos pass only has to downsample by at most 2x
+    pyramid = [img]
+    while pyramid[-1].width // 2 >= min(sizes):
+        pyramid.append(pyramid[-1].reduce(2))
+
     for ico_size in sizes:
-        resized = img.resize((ico_size, ico_size), Image.Resampling.LANCZOS)
+        source = min(
+            (level for level in pyramid if level.width >= ico_size),
+            key=lambda level: level.width,
+        )
+        if source.width == ico_size:
+            resized = source
+        else:
+            resized = source.resize(
+                (ico_size, ico_size), Image.Resampling.LANCZOS, reducing_gap=3.0
+            )
         images.append(resized)
 
-    # Save ICO file
+    # Save ICO file, passing the frames above so Pillow writes them as-is
+    # instead of resampling every size again internally
     os.makedirs("assets", exist_ok=True)
-    img.save("assets/icon.ico", format="ICO", sizes=[(s, s) for s in sizes])
+    img.save(
+        "assets/icon.ico",
+        format="ICO",
+        sizes=[(s, s) for s in sizes],
+        append_images=images,
+    )
     print("Icon created: assets/icon.ico")
 
 
@@ -4,26 +4,227 @@
 模擬 GitHub Actions 的完整流程，包括壓縮檔建立
 """
 
+import os
+import stat
 import sys
 import shutil
+import time
 import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
+try:
+    # libdeflate 綁定（選用）：比內建 zlib 更快且壓縮率更高
+    import deflate
+except ImportError:
+    deflate = None
+
+
+# 以秒為單位快取格式化後的時間戳記，同一秒內的日誌共用同一字串
+_last_sec = [0]
+_last_stamp = [""]
+
+
+def _timestamp():
+    """取得目前時間戳記字串（每秒只格式化一次）"""
+    now = int(time.time())
+    if now != _last_sec[0]:
+        _last_stamp[0] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now))
+        _last_sec[0] = now
+    return _last_stamp[0]
+
 
 def log_info(message):
     """輸出信息日誌"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[INFO] {timestamp} - {message}")
+    sys.stdout.write(f"[INFO] {_timestamp()} - {message}\n")
 
 
 def log_error(message):
     """輸出錯誤日誌"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[ERROR] {timestamp} - {message}")
+    sys.stdout.write(f"[ERROR] {_timestamp()} - {message}\n")
+
+
+# 預設使用高壓縮等級：發布檔只建立一次，但會被下載多次
+# libdeflate 支援 1-12 級，第 10 級的壓縮率與速度皆優於 zlib 第 9 級
+MAX_COMPRESS_LEVEL = 12 if deflate else 9
+DEFAULT_COMPRESS_LEVEL = 10 if deflate else 9
+# 取樣前 64 KiB 判斷是否值得壓縮，壓縮率高於此比例則直接儲存
+COMPRESS_SAMPLE_SIZE = 64 * 1024
+INCOMPRESSIBLE_RATIO = 0.95
+# 串流寫入 ZIP 時每次讀取的區塊大小
+STREAM_CHUNK_SIZE = 1024 * 1024
+# libdeflate 不支援串流，超過此大小的檔案改用 zlib 串流壓縮
+DEFLATE_MAX_BUFFER_SIZE = 64 * 1024 * 1024
+# write_precompressed 依賴 ZipFile 的內部實作（_writecheck、fp、start_dir 等），
+# 只在驗證過的 Python 版本上使用；其他版本改以公開 API 在主行程串流壓縮
+PRECOMPRESSED_PYTHON_VERSIONS = ((3, 13),)
+_ZIPFILE_INTERNALS = (
+    "_writecheck",
+    "_didModify",
+    "fp",
+    "start_dir",
+    "filelist",
+    "NameToInfo",
+)
+
+
+def is_compressible(file_path):
+    """取樣檔案開頭判斷是否值得壓縮（已壓縮的內容直接儲存）"""
+    with open(file_path, "rb") as f:
+        sample = f.read(COMPRESS_SAMPLE_SIZE)
+    if len(sample) < COMPRESS_SAMPLE_SIZE:
+        # 小檔案壓縮成本可忽略，一律壓縮
+        return True
+    return len(zlib.compress(sample, 1)) < len(sample) * INCOMPRESSIBLE_RATIO
 
 
-def simulate_full_release_process(version="test-v0.1.0"):
+def walk_files(root):
+    """以 os.scandir 遞迴列出檔案，直接使用目錄項目快取的類型資訊"""
+    with os.scandir(root) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                yield from walk_files(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry
+
+
+def make_zipinfo(arcname, st):
+    """依檔案的 stat 結果建立 ZipInfo（保留修改時間與權限）"""
+    zinfo = zipfile.ZipInfo(arcname, time.localtime(st.st_mtime)[:6])
+    zinfo.external_attr = (st.st_mode & 0xFFFF) << 16
+    zinfo.file_size = st.st_size
+    return zinfo
+
+
+def supports_precompressed(zipf=None):
+    """目前的 Python 版本（與 ZipFile 物件）是否支援直接寫入預先壓縮的資料"""
+    if sys.version_info[:2] not in PRECOMPRESSED_PYTHON_VERSIONS:
+        return False
+    return zipf is None or all(hasattr(zipf, name) for name in _ZIPFILE_INTERNALS)
+
+
+def write_precompressed(zipf, st, arcname, compressed, crc, file_size):
+    """將已壓縮好的 raw DEFLATE 資料直接寫入 ZIP（不經過 zlib）"""
+    zinfo = make_zipinfo(arcname, st)
+    zinfo.compress_type = zipfile.ZIP_DEFLATED
+    zinfo.CRC = crc
+    zinfo.file_size = file_size
+    zinfo.compress_size = len(compressed)
+
+    # 依 ZipFile.write 的流程寫入 local file header 與資料，
+    # 中央目錄由 ZipFile.close() 根據 filelist 產生
+    zipf._writecheck(zinfo)
+    zipf._didModify = True
+    zinfo.header_offset = zipf.fp.tell()
+    zipf.fp.write(zinfo.FileHeader())
+    zipf.fp.write(compressed)
+    zipf.filelist.append(zinfo)
+    zipf.NameToInfo[zinfo.filename] = zinfo
+    zipf.start_dir = zipf.fp.tell()
+
+
+def stream_to_zip(zipf, entry, arcname, compress_type, level):
+    """以固定大小區塊串流寫入 ZIP，記憶體用量與檔案大小無關"""
+    zinfo = make_zipinfo(arcname, entry.stat())
+    zinfo.compress_type = compress_type
+    zinfo.compress_level = level
+    with open(entry.path, "rb") as src, zipf.open(zinfo, "w") as dst:
+        shutil.copyfileobj(src, dst, length=STREAM_CHUNK_SIZE)
+
+
+def compress_member(file_path, level):
+    """在工作行程中壓縮單一檔案，回傳 (raw DEFLATE 資料, CRC32, 原始大小)"""
+    if deflate:
+        with open(file_path, "rb") as f:
+            data = f.read()
+        return deflate.deflate_compress(data, level), zlib.crc32(data), len(data)
+
+    # ZIP 需要不含 zlib 標頭的 raw DEFLATE（wbits=-15）
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    chunks = []
+    crc = 0
+    size = 0
+    with open(file_path, "rb") as f:
+        while chunk := f.read(STREAM_CHUNK_SIZE):
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            chunks.append(compressor.compress(chunk))
+    chunks.append(compressor.flush())
+    return b"".join(chunks), crc, size
+
+
+def build_release_zip(zip_path, release_dir, level):
+    """建立發布壓縮檔，各檔案的壓縮工作平行分派到多個行程"""
+    precompressed = supports_precompressed()
+    if not precompressed:
+        log_info(
+            f"Python {sys.version_info[0]}.{sys.version_info[1]} 未驗證預先壓縮寫入，"
+            "改為逐一串流壓縮"
+        )
+
+    members = []
+    for entry in walk_files(release_dir):
+        # 在 ZIP 中使用相對路徑（不包含 release/ 前綴）
+        arcname = os.path.relpath(entry.path, release_dir)
+        if level == 0 or not is_compressible(entry.path):
+            mode = "stored"
+        elif not precompressed or entry.stat().st_size > DEFLATE_MAX_BUFFER_SIZE:
+            # 大檔案整塊壓縮會佔用大量記憶體，改在主行程串流壓縮
+            mode = "stream"
+        else:
+            mode = "parallel"
+        members.append((entry, arcname, mode))
+
+    # 只有一個待壓縮檔案時不值得付出建立行程的成本
+    parallel = [entry.path for entry, _, mode in members if mode == "parallel"]
+    executor = ProcessPoolExecutor() if len(parallel) > 1 else None
+    try:
+        futures = {}
+        if executor:
+            for file_path in parallel:
+                futures[file_path] = executor.submit(compress_member, file_path, level)
+
+        with zipfile.ZipFile(
+            zip_path,
+            "w",
+            compression=zipfile.ZIP_DEFLATED,
+            compresslevel=min(level, 9),
+        ) as zipf:
+            # ZipFile 內部結構不符預期時，已壓縮的成員也改走公開 API
+            if parallel and not supports_precompressed(zipf):
+                log_info("ZipFile 內部結構與預期不同，改為逐一串流壓縮")
+                members = [
+                    (entry, arcname, "stream" if mode == "parallel" else mode)
+                    for entry, arcname, mode in members
+                ]
+
+            # 依原順序在主行程中寫入，確保 ZIP 內容順序固定
+            for entry, arcname, mode in members:
+                if mode == "stored":
+                    stream_to_zip(zipf, entry, arcname, zipfile.ZIP_STORED, None)
+                elif mode == "stream":
+                    stream_to_zip(
+                        zipf, entry, arcname, zipfile.ZIP_DEFLATED, min(level, 9)
+                    )
+                else:
+                    future = futures.get(entry.path)
+                    compressed, crc, size = (
+                        future.result()
+                        if future
+                        else compress_member(entry.path, level)
+                    )
+                    write_precompressed(
+                        zipf, entry.stat(), arcname, compressed, crc, size
+                    )
+                log_info(f"  添加到 ZIP: {arcname}")
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+
+
+def simulate_full_release_process(version="test-v0.1.0", level=DEFAULT_COMPRESS_LEVEL):
     """模擬完整的發布流程"""
     log_info("=" * 60)
     log_info(f"開始模擬完整發布流程 - 版本: {version}")
@@ -77,17 +278,13 @@ Test Mode: ON
                 return False
 
         # 步驟 4: 建立壓縮檔
-        log_info("步驟 4: 建立壓縮檔...")
+        log_info(
+            f"步驟 4: 建立壓縮檔 (後端: {'libdeflate' if deflate else 'zlib'}, 等級: {level})..."
+        )
         zip_filename = f"SystemMonitor-{version}.zip"
         zip_path = Path(zip_filename)
 
-        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-            for file_path in release_dir.rglob("*"):
-                if file_path.is_file():
-                    # 在 ZIP 中使用相對路徑（不包含 release/ 前綴）
-                    arcname = file_path.relative_to(release_dir)
-                    zipf.write(file_path, arcname)
-                    log_info(f"  添加到 ZIP: {arcname}")
+        build_release_zip(zip_path, release_dir, level)
 
         zip_size = zip_path.stat().st_size
         log_info(f"✅ 壓縮檔已建立: {zip_path} ({zip_size} bytes)")
@@ -111,11 +308,10 @@ Test Mode: ON
             zipf.extractall(extract_dir)
 
         log_info("解壓縮結果:")
-        for item in extract_dir.rglob("*"):
-            if item.is_file():
-                log_info(
-                    f"  - {item.relative_to(extract_dir)} ({item.stat().st_size} bytes)"
-                )
+        for entry in walk_files(extract_dir):
+            log_info(
+                f"  - {os.path.relpath(entry.path, extract_dir)} ({entry.stat().st_size} bytes)"
+            )
 
         # 步驟 7: 清理
         log_info("步驟 7: 清理暫存檔案...")
@@ -138,6 +334,20 @@ Test Mode: ON
         return False
 
 
+def remove_path(path):
+    """刪除檔案或目錄（只做一次 lstat 判斷類型），回傳是否有刪除"""
+    try:
+        st = path.lstat()
+    except FileNotFoundError:
+        return False
+
+    if stat.S_ISDIR(st.st_mode):
+        shutil.rmtree(path)
+    else:
+        path.unlink(missing_ok=True)
+    return True
+
+
 def cleanup():
     """清理所有測試產生的檔案"""
     log_info("清理測試檔案...")
@@ -145,46 +355,51 @@ def cleanup():
     cleanup_items = ["dist", "release", "test_extract", "SystemMonitor-*.zip"]
 
     for item in cleanup_items:
-        if "*" in item:
-            # 處理萬用字元
-            for path in Path(".").glob(item):
-                if path.exists():
-                    if path.is_dir():
-                        shutil.rmtree(path)
-                    else:
-                        path.unlink()
-                    log_info(f"🗑️  已刪除: {path}")
-        else:
-            path = Path(item)
-            if path.exists():
-                if path.is_dir():
-                    shutil.rmtree(path)
-                else:
-                    path.unlink()
+        # 處理萬用字元
+        paths = Path(".").glob(item) if "*" in item else [Path(item)]
+        for path in paths:
+            if remove_path(path):
                 log_info(f"🗑️  已刪除: {path}")
 
 
 def main():
     """主函數"""
-    if len(sys.argv) > 1:
-        if sys.argv[1] == "cleanup":
+    args = sys.argv[1:]
+
+    # 壓縮等級（本地開發可用 --level 1 加快速度）
+    level = DEFAULT_COMPRESS_LEVEL
+    if "--level" in args:
+        index = args.index("--level")
+        try:
+            level = int(args[index + 1])
+        except (IndexError, ValueError):
+            log_error(f"--level 需要 0-{MAX_COMPRESS_LEVEL} 的整數")
+            sys.exit(1)
+        if not 0 <= level <= MAX_COMPRESS_LEVEL:
+            log_error(f"--level 需要 0-{MAX_COMPRESS_LEVEL} 的整數")
+            sys.exit(1)
+        del args[index : index + 2]
+
+    if args:
+        if args[0] == "cleanup":
             cleanup()
             return
-        elif sys.argv[1].startswith("test-"):
-            version = sys.argv[1]
+        elif args[0].startswith("test-"):
+            version = args[0]
         else:
-            version = f"test-{sys.argv[1]}"
+            version = f"test-{args[0]}"
     else:
         version = "test-v0.1.0"
 
     # 執行完整流程測試
-    success = simulate_full_release_process(version)
+    success = simulate_full_release_process(version, level)
 
     if success:
         log_info("\n💡 提示：")
         log_info("   - 檢查生成的 ZIP 檔案")
         log_info("   - 執行 'python local_test_full.py cleanup' 清理檔案")
         log_info("   - 可指定版本：'python local_test_full.py v1.2.3'")
+        log_info("   - 可指定壓縮等級：'python local_test_full.py --level 1'")
         sys.exit(0)
     else:
         sys.exit(1)
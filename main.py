@@ -18,7 +18,6 @@ from pathlib import Path
 import sys
 import os
 import time
-import schedule
 import threading
 import tkinter as tk
 
@@ -36,6 +35,15 @@ from src.ui import SystemTrayIcon, show_settings_window
 logger = init_logger(app_name="system_monitor")
 os.environ["PYTHONUTF8"] = "1"
 
+ICON_PATH = "assets/icon.ico"
+
+# 批次上傳：最多累積 UPLOAD_BATCH_SIZE 個監控週期的資料，
+# 且距上次上傳不超過 UPLOAD_MAX_DELAY_SECONDS（監控間隔較長時每筆都直接上傳）
+UPLOAD_BATCH_SIZE = 20
+UPLOAD_MAX_DELAY_SECONDS = 1800
+# 關閉程式時等待緩衝資料上傳的最長秒數
+SHUTDOWN_FLUSH_TIMEOUT = 15.0
+
 
 class SystemMonitor:
     """系統監控主程式"""
@@ -45,12 +53,17 @@ class SystemMonitor:
         self.is_running = False
         self.is_monitoring = False
         self.monitoring_thread = None
-        self.schedule_lock = threading.Lock()  # 新增鎖用於保護 schedule
+        self._next_run = None  # 下次收集資料的時間（monotonic）
+        self._wake = threading.Event()  # 喚醒監控循環（狀態變更時立即重新排程）
+
+        # 快取監控週期中使用的設定值
+        self._load_monitoring_settings()
 
         # 初始化元件
         self.system_collector = SystemInfoCollector()
         self.file_scanner = FileScanner()
         self.sheets_client = None
+        self._flush_thread: Optional[threading.Thread] = None
         self.tray_icon = None
 
         # 設定視窗
@@ -65,18 +78,46 @@ class SystemMonitor:
 
         logger.info("System Monitor 初始化完成")
 
+    def _load_monitoring_settings(self):
+        """快取每個監控週期都會讀取的設定值（設定變更時重新載入）"""
+        self._config = settings.snapshot()
+
     def _initialize_sheets_client(self) -> bool:
         """初始化 Google Sheets 客戶端"""
         try:
-            if not settings.credentials_file or not settings.spreadsheet_url:
+            config = self._config
+            if not config.credentials_file or not config.spreadsheet_url:
                 logger.warning("Google Sheets 設定不完整")
                 return False
 
-            self.sheets_client = GoogleSheetsClient(
-                settings.credentials_file,
-                settings.spreadsheet_url,
-                settings.worksheet_name,
+            flush_interval = min(
+                UPLOAD_MAX_DELAY_SECONDS, config.interval_seconds * UPLOAD_BATCH_SIZE
             )
+            old_client = self.sheets_client
+            if old_client is not None and (
+                old_client.credentials_file,
+                old_client.spreadsheet_url,
+                old_client.worksheet_name,
+            ) == (
+                config.credentials_file,
+                config.spreadsheet_url,
+                config.worksheet_name,
+            ):
+                # 連線設定未變更：沿用既有客戶端（連線與待上傳資料都保留）
+                old_client.set_flush_interval(flush_interval)
+            else:
+                self.sheets_client = GoogleSheetsClient(
+                    config.credentials_file,
+                    config.spreadsheet_url,
+                    config.worksheet_name,
+                    flush_threshold=UPLOAD_BATCH_SIZE,
+                    flush_interval=flush_interval,
+                )
+                # 舊客戶端尚未上傳成功的資料移交給新客戶端，不會遺失
+                if old_client is not None:
+                    self.sheets_client.adopt_pending_rows(
+                        old_client.take_pending_rows()
+                    )
 
             # 測試連線
             test_result = self.sheets_client.test_connection()
@@ -101,7 +142,7 @@ class SystemMonitor:
             logger.info("開始收集系統資料...")
 
             # 收集系統資訊
-            system_info = self.system_collector.get_all_system_info()
+            snapshot = self.system_collector.get_snapshot()
 
             # 再次檢查狀態
             if not self.is_monitoring or not self.is_running:
@@ -109,9 +150,9 @@ class SystemMonitor:
 
             # 收集目錄資訊
             directory_contents = ""
-            if settings.monitor_directories:
+            if self._config.monitor_directories:
                 scan_results = self.file_scanner.scan_multiple_directories(
-                    settings.monitor_directories
+                    self._config.monitor_directories, summary_only=True
                 )
                 directory_contents = self.file_scanner.format_scan_results_for_sheets(
                     scan_results
@@ -124,21 +165,23 @@ class SystemMonitor:
             # 上傳到 Google Sheets
             if self.sheets_client:
                 success = self.sheets_client.upload_system_data(
-                    system_info, directory_contents
+                    snapshot, directory_contents
                 )
-                if success:
+                pending = self.sheets_client.pending_count
+                if success and pending:
+                    # 資料只加入緩衝區，尚未送出
+                    logger.info(f"系統資料已排入上傳佇列 (待上傳 {pending} 筆)")
+                    self._update_tray_status(f"已排入 {pending} 筆")
+                elif success:
                     logger.info("系統資料上傳成功")
                     self._update_tray_status("資料上傳成功")
 
                     # 顯示通知（如果啟用）
-                    if settings.get("ui.show_notifications", True) and self.tray_icon:
-                        cpu_usage = system_info.get("cpu_usage", 0)
-                        ram_usage = system_info.get("memory", {}).get(
-                            "usage_percent", 0
-                        )
+                    if self._config.show_notifications and self.tray_icon:
                         self.tray_icon.show_notification(
                             "系統監控",
-                            f"資料已上傳 - CPU: {cpu_usage}%, RAM: {ram_usage}%",
+                            f"資料已上傳 - CPU: {snapshot.cpu_pct}%, "
+                            f"RAM: {snapshot.mem_pct}%",
                         )
                 else:
                     logger.error("系統資料上傳失敗")
@@ -165,18 +208,27 @@ class SystemMonitor:
 
         while self.is_running:
             try:
-                # 安全地執行排程檢查
-                if self.is_monitoring:
-                    with self.schedule_lock:
-                        schedule.run_pending()
-                time.sleep(1)  # 每秒檢查一次
+                self._wake.clear()
+
+                # 到達排程時間則收集資料，並從完成時間起算下一次
+                next_run = self._next_run
+                if (
+                    self.is_monitoring
+                    and next_run is not None
+                    and time.monotonic() >= next_run
+                ):
+                    self._collect_and_upload_data()
+                    self._next_run = time.monotonic() + self._config.interval_seconds
+
+                # 等到下一個排程時間；未監控時則等到被狀態變更喚醒
+                delay = None
+                if self.is_monitoring and self._next_run is not None:
+                    delay = max(0.0, self._next_run - time.monotonic())
+                self._wake.wait(timeout=delay)
             except Exception as e:
                 logger.error(f"監控循環錯誤: {e}")
-                # 發生錯誤時等待更長時間再繼續
-                for _ in range(5):
-                    if not self.is_running:
-                        break
-                    time.sleep(1)
+                # 發生錯誤時等待更長時間再繼續（關閉時會被喚醒）
+                self._wake.wait(timeout=5)
 
         logger.info("監控循環結束")
 
@@ -200,6 +252,7 @@ class SystemMonitor:
                 return
 
             # 初始化 Google Sheets 客戶端
+            self._load_monitoring_settings()
             if not self._initialize_sheets_client():
                 logger.error("無法初始化 Google Sheets 客戶端")
                 if self.tray_icon:
@@ -210,23 +263,21 @@ class SystemMonitor:
                 return
 
             # 設定排程
-            with self.schedule_lock:
-                schedule.clear()  # 清除現有排程
-                schedule.every(settings.interval_minutes).minutes.do(
-                    self._collect_and_upload_data
-                )
+            self._next_run = time.monotonic() + self._config.interval_seconds
 
             self.is_monitoring = True
+            self._wake.set()
             self._update_tray_status("監控中...")
 
             # 立即執行一次
             self._collect_and_upload_data()
 
-            logger.info(f"監控已啟動，間隔: {settings.interval_minutes} 分鐘")
+            interval_minutes = self._config.interval_minutes
+            logger.info(f"監控已啟動，間隔: {interval_minutes} 分鐘")
 
             if self.tray_icon:
                 self.tray_icon.show_notification(
-                    "監控啟動", f"每 {settings.interval_minutes} 分鐘收集一次資料"
+                    "監控啟動", f"每 {interval_minutes} 分鐘收集一次資料"
                 )
 
         except Exception as e:
@@ -243,8 +294,11 @@ class SystemMonitor:
                 return
 
             self.is_monitoring = False
-            with self.schedule_lock:
-                schedule.clear()
+            self._next_run = None
+            self._wake.set()
+
+            # 在背景上傳緩衝區中尚未送出的資料（重試可能需要數分鐘，不阻塞介面）
+            self._start_background_flush()
             self._update_tray_status("已停止")
 
             logger.info("監控已停止")
@@ -255,6 +309,21 @@ class SystemMonitor:
         except Exception as e:
             logger.error(f"停止監控失敗: {e}")
 
+    def _start_background_flush(self):
+        """在背景執行緒上傳緩衝區中尚未送出的資料"""
+        client = self.sheets_client
+        if client is None or not client.pending_count:
+            return
+
+        def flush():
+            if not client.flush():
+                logger.error("上傳緩衝資料失敗")
+
+        self._flush_thread = threading.Thread(
+            target=flush, name="sheets-flush", daemon=True
+        )
+        self._flush_thread.start()
+
     def toggle_monitoring(self, start: Optional[bool] = None):
         """切換監控狀態"""
         if start is None:
@@ -290,6 +359,11 @@ class SystemMonitor:
                     self.settings_window.window.focus_force()
                 return
 
+            if self.settings_window:
+                # 重複使用既有的設定視窗物件與其 tkinter 變數
+                self.settings_window.show()
+                return
+
             logger.info("在主執行緒中創建設定視窗")
             self.settings_window = show_settings_window(
                 settings, on_settings_changed=self._on_settings_changed
@@ -316,6 +390,8 @@ class SystemMonitor:
         """設定變更回調"""
         try:
             logger.info("設定已變更，重新初始化...")
+            self._load_monitoring_settings()
+            self._wake.set()
 
             # 如果正在監控，重新啟動
             if self.is_monitoring:
@@ -328,15 +404,28 @@ class SystemMonitor:
         except Exception as e:
             logger.error(f"處理設定變更失敗: {e}")
 
+    def _load_icon_image(self):
+        """載入並解碼托盤圖示，失敗時回傳 None 由托盤使用預設圖示"""
+        try:
+            from PIL import Image
+
+            icon_image = Image.open(ICON_PATH)
+            icon_image.load()
+            return icon_image
+        except Exception as e:
+            logger.warning(f"載入托盤圖示失敗: {e}")
+            return None
+
     def run(self):
         """執行主程式"""
         try:
             self.is_running = True
 
-            # 建立托盤圖示
+            # 建立托盤圖示（預先解碼圖示，托盤不需再讀取檔案）
             self.tray_icon = SystemTrayIcon(
                 title="System Monitor",
-                icon_path="assets/icon.ico",
+                icon_path=ICON_PATH,
+                icon_image=self._load_icon_image(),
                 on_settings_click=self.show_settings,
                 on_toggle_monitoring=self.toggle_monitoring,
                 on_exit_click=self.shutdown,
@@ -387,6 +476,7 @@ class SystemMonitor:
             logger.info("正在關閉 System Monitor...")
 
             self.is_running = False
+            self._wake.set()
             self.stop_monitoring()
 
             # 等待監控執行緒結束
@@ -394,6 +484,16 @@ class SystemMonitor:
                 logger.info("等待監控執行緒結束...")
                 self.monitoring_thread.join(timeout=5.0)
 
+            # 等待緩衝資料上傳（有上限，避免無法關閉）
+            if self._flush_thread and self._flush_thread.is_alive():
+                logger.info("等待緩衝資料上傳...")
+                self._flush_thread.join(timeout=SHUTDOWN_FLUSH_TIMEOUT)
+                if self._flush_thread.is_alive():
+                    logger.warning("緩衝資料上傳逾時，未送出的資料將遺失")
+
+            # 停止系統資訊收集執行緒池
+            self.system_collector.close()
+
             # 關閉托盤圖示
             if self.tray_icon:
                 self.tray_icon.stop()
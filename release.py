@@ -7,50 +7,70 @@
 import re
 import subprocess
 import sys
+import tomllib
 from pathlib import Path
 
+PYPROJECT_PATH = Path("pyproject.toml")
 
-def get_current_version():
-    """從 pyproject.toml 讀取當前版本"""
-    pyproject_path = Path("pyproject.toml")
-    if not pyproject_path.exists():
+
+def read_pyproject():
+    """讀取 pyproject.toml 內容"""
+    if not PYPROJECT_PATH.exists():
         print("❌ 找不到 pyproject.toml 檔案")
         return None
 
-    content = pyproject_path.read_text(encoding="utf-8")
-    match = re.search(r'version\s*=\s*"([^"]+)"', content)
-    if match:
-        return match.group(1)
-    return None
-
+    return PYPROJECT_PATH.read_text(encoding="utf-8")
 
-def update_version(new_version):
-    """更新 pyproject.toml 中的版本號"""
-    pyproject_path = Path("pyproject.toml")
-    content = pyproject_path.read_text(encoding="utf-8")
 
-    # 更新版本號
-    new_content = re.sub(
-        r'version\s*=\s*"[^"]+"', f'version = "{new_version}"', content
-    )
+def get_current_version(content):
+    """從 pyproject.toml 內容解析當前版本（格式錯誤或缺少版本號時回傳 None）"""
+    try:
+        data = tomllib.loads(content)
+    except tomllib.TOMLDecodeError as e:
+        print(f"❌ pyproject.toml 格式錯誤: {e}")
+        return None
 
-    pyproject_path.write_text(new_content, encoding="utf-8")
+    project = data.get("project")
+    version = project.get("version") if isinstance(project, dict) else None
+    if not version:
+        print("❌ pyproject.toml 缺少 [project].version 設定")
+        return None
+    return version
+
+
+def update_version(content, new_version):
+    """更新 pyproject.toml 中的版本號（使用已讀取的內容，不重新讀檔）"""
+    # 只更新 [project] 區段，避免誤改其他區段中的 version 設定
+    sections = content.split("\n[")
+    for i, section in enumerate(sections):
+        header = section if i == 0 else "[" + section
+        if header.startswith("[project]"):
+            sections[i] = re.sub(
+                r'^version\s*=\s*"[^"]+"',
+                f'version = "{new_version}"',
+                section,
+                count=1,
+                flags=re.MULTILINE,
+            )
+            break
+    new_content = "\n[".join(sections)
+
+    PYPROJECT_PATH.write_text(new_content, encoding="utf-8")
     print(f"✅ 已更新版本號為 {new_version}")
 
 
 def run_command(cmd):
-    """執行命令並返回結果"""
+    """執行命令並返回結果（cmd 為參數清單，不經過 shell）"""
     try:
         result = subprocess.run(
             cmd,
-            shell=True,
             capture_output=True,
             text=True,
             encoding="utf-8",
             errors="replace",
         )
         if result.returncode != 0:
-            print(f"❌ 命令執行失敗: {cmd}")
+            print(f"❌ 命令執行失敗: {' '.join(cmd)}")
             print(f"錯誤: {result.stderr}")
             return False
         return True
@@ -59,38 +79,72 @@ def run_command(cmd):
         return False
 
 
-def create_release(version, message=None):
-    """建立 Git tag 和推送"""
-    tag_name = f"v{version}"  # 檢查是否有未提交的變更
+def get_git_status():
+    """
+    以單次 git status 取得工作目錄與分支狀態
+
+    回傳 (是否有未提交變更, 領先上游的 commit 數)；
+    沒有上游分支時領先數為 None。指令失敗時回傳 None。
+    """
     result = subprocess.run(
-        "git status --porcelain",
-        shell=True,
+        ["git", "status", "-z", "--porcelain=v2", "--branch"],
         capture_output=True,
         text=True,
         encoding="utf-8",
         errors="replace",
     )
-    if result.stdout.strip():
+    if result.returncode != 0:
+        print("❌ 無法取得 git 狀態")
+        print(f"錯誤: {result.stderr}")
+        return None
+
+    dirty = False
+    ahead = None
+    for record in result.stdout.split("\0"):
+        if record.startswith("# branch.ab "):
+            # 格式: # branch.ab +<ahead> -<behind>
+            ahead = int(record.split()[2].lstrip("+"))
+        elif record and not record.startswith("#"):
+            dirty = True
+    return dirty, ahead
+
+
+def create_release(version, message=None):
+    """建立 Git tag 和推送"""
+    tag_name = f"v{version}"
+
+    # 檢查是否有未提交的變更
+    status = get_git_status()
+    if status is None:
+        return False
+
+    dirty, ahead = status
+    committed = False
+    if dirty:
         print("📝 發現未提交的變更，正在提交...")
-        if not run_command("git add ."):
+        if not run_command(["git", "add", "."]):
             return False
 
         commit_msg = message or f"Release version {version}"
-        if not run_command(f'git commit -m "{commit_msg}"'):
+        if not run_command(["git", "commit", "-m", commit_msg]):
             return False
+        committed = True
 
     # 建立 tag
     tag_msg = f"Release {tag_name}"
-    if not run_command(f'git tag -a {tag_name} -m "{tag_msg}"'):
+    if not run_command(["git", "tag", "-a", tag_name, "-m", tag_msg]):
         return False
 
     print(f"✅ 已建立 tag: {tag_name}")
 
-    # 推送到遠端
-    if not run_command("git push origin main"):
-        return False
+    # 推送到遠端：分支沒有新 commit 時只需推送 tag
+    if committed or ahead != 0:
+        # 一次推送分支與 annotated tag，兩者同時成功或同時失敗
+        push_cmd = ["git", "push", "--atomic", "--follow-tags", "origin", "main"]
+    else:
+        push_cmd = ["git", "push", "origin", tag_name]
 
-    if not run_command(f"git push origin {tag_name}"):
+    if not run_command(push_cmd):
         return False
 
     print(f"🚀 已推送 tag {tag_name} 到遠端，GitHub Actions 將自動開始建置和發布！")
@@ -105,7 +159,8 @@ def main():
         print("  例如: python release.py 0.2.0 'Add new monitoring features'")
         print()
 
-        current = get_current_version()
+        content = read_pyproject()
+        current = get_current_version(content) if content is not None else None
         if current:
             print(f"目前版本: {current}")
         return
@@ -118,18 +173,24 @@ def main():
         print("❌ 版本號格式錯誤，請使用 x.y.z 格式（例如: 1.0.0）")
         return
 
-    current_version = get_current_version()
-    if current_version:
-        print(f"目前版本: {current_version}")
-        print(f"新版本: {new_version}")
+    content = read_pyproject()
+    if content is None:
+        return
+
+    current_version = get_current_version(content)
+    if current_version is None:
+        return
+
+    print(f"目前版本: {current_version}")
+    print(f"新版本: {new_version}")
 
-        confirm = input("確定要發布此版本嗎？(y/N): ")
-        if confirm.lower() != "y":
-            print("已取消")
-            return
+    confirm = input("確定要發布此版本嗎？(y/N): ")
+    if confirm.lower() != "y":
+        print("已取消")
+        return
 
     # 更新版本號
-    update_version(new_version)
+    update_version(content, new_version)
 
     # 建立發布
     if create_release(new_version, commit_message):
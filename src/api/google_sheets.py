@@ -3,15 +3,67 @@ Google Sheets API 整合模組
 """
 
 import gspread
+from google.auth.transport.requests import AuthorizedSession, Request
 from google.oauth2.service_account import Credentials
-from typing import List, Dict, Any, Optional
+from requests.adapters import HTTPAdapter
+from tenacity import (
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
+from urllib3.util.retry import Retry
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from datetime import datetime
+import re
+import threading
 import time
 from superyngo_logger import init_logger
 
+from ..monitor import SystemSnapshot
+
 # 初始化日誌器
 logger = init_logger(app_name="system_monitor")
 
+# 時間戳記欄位格式；固定寬度且補零，可直接以字串比較先後
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+_TIMESTAMP_RE = re.compile(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}")
+
+# 可重試的 API 錯誤狀態碼（速率限制與暫時性伺服器錯誤）
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+_backoff = wait_exponential_jitter(initial=1, max=30)
+
+
+def _is_retryable_api_error(exc: BaseException) -> bool:
+    """判斷 API 錯誤是否值得重試"""
+    if not isinstance(exc, gspread.exceptions.APIError):
+        return False
+    response = getattr(exc, "response", None)
+    return getattr(response, "status_code", None) in RETRYABLE_STATUS_CODES
+
+
+def _retry_wait(retry_state) -> float:
+    """計算重試等待秒數，優先採用伺服器回傳的 Retry-After"""
+    exc = retry_state.outcome.exception()
+    response = getattr(exc, "response", None)
+    retry_after = getattr(response, "headers", {}).get("Retry-After")
+    if retry_after:
+        try:
+            return min(float(retry_after), 60.0)
+        except ValueError:
+            pass
+    return _backoff(retry_state)
+
+
+# API 呼叫遇到速率限制或暫時性錯誤時以指數退避重試，最終仍失敗則拋出原例外
+_api_retry = retry(
+    stop=stop_after_attempt(5),
+    wait=_retry_wait,
+    retry=retry_if_exception(_is_retryable_api_error),
+    reraise=True,
+)
+
 
 class GoogleSheetsClient:
     """Google Sheets 客戶端"""
@@ -22,11 +74,52 @@ class GoogleSheetsClient:
         "https://www.googleapis.com/auth/drive",
     ]
 
+    # 表頭
+    HEADERS = (
+        "時間戳記",
+        "CPU使用率(%)",
+        "RAM使用率(%)",
+        "RAM使用量(GB)",
+        "RAM總量(GB)",
+        "網路上傳(MB/s)",
+        "網路下載(MB/s)",
+        "目錄內容",
+        "電池電量(%)",
+        "電池狀態",
+        "系統運行時間(小時)",
+        "磁碟使用率(%)",
+        "磁碟可用空間(GB)",
+    )
+
+    # 資料的最後一欄（A1 表示法的欄名）
+    _LAST_COLUMN = gspread.utils.rowcol_to_a1(1, len(HEADERS)).rstrip("1")
+
+    # 各欄位對應的 SystemSnapshot 屬性名稱（順序與 HEADERS 相同）；
+    # 以 "_" 開頭的名稱為每次上傳時另外計算的欄位
+    _ROW_SPEC = (
+        "_timestamp",
+        "cpu_pct",
+        "mem_pct",
+        "mem_used_gb",
+        "mem_total_gb",
+        "net_mb_sent_per_sec",
+        "net_mb_recv_per_sec",
+        "_directory_contents",
+        "_battery_percent",
+        "_battery_status",
+        "uptime_hours",
+        "disk_pct",
+        "disk_free_gb",
+    )
+
     def __init__(
         self,
         credentials_file: str,
         spreadsheet_url: str,
         worksheet_name: str = "System Monitor",
+        flush_threshold: int = 20,
+        flush_interval: float = 1800,
+        max_pending_rows: int = 1000,
     ):
         """
         初始化 Google Sheets 客戶端
@@ -35,22 +128,47 @@ class GoogleSheetsClient:
             credentials_file: 服務帳戶憑證檔案路徑
             spreadsheet_url: Google Sheets 表單 URL
             worksheet_name: 工作表名稱
+            flush_threshold: 累積多少筆資料後批次上傳
+            flush_interval: 距上次上傳超過多少秒後批次上傳
+            max_pending_rows: 緩衝區上限，上傳持續失敗時捨棄最舊的資料
         """
         self.credentials_file = credentials_file
         self.spreadsheet_url = spreadsheet_url
         self.worksheet_name = worksheet_name
         self.client = None
+        self._credentials = None
+        self._session = None
         self.spreadsheet = None
         self.worksheet = None
         self._last_connection_time = 0
         self._connection_timeout = 300  # 5分鐘重新連線
 
+        # 待上傳資料緩衝區（以 append_rows 批次上傳）
+        # 監控執行緒與 UI/托盤執行緒都可能呼叫 flush：
+        # _pending_lock 只在存取緩衝區時短暫持有；_flush_lock 確保同時只有一次上傳，
+        # 網路請求期間不持有 _pending_lock，新資料仍可加入緩衝區
+        self._pending_rows: List[List[Any]] = []
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_threshold = flush_threshold
+        self._flush_interval = flush_interval
+        self._max_pending_rows = max_pending_rows
+        # 從 0 起算，啟動後的第一筆資料會立即上傳
+        self._last_flush_time = 0.0
+
+        # get_all_values 結果快取：(取得時間, 資料)，任何寫入後失效
+        self._values_cache: Optional[Tuple[float, List[List[str]]]] = None
+        self._values_ttl = 30
+
         logger.info(f"Google Sheets 客戶端初始化: {worksheet_name}")
 
-    def connect(self) -> bool:
+    def connect(self, force: bool = False) -> bool:
         """
         連線到 Google Sheets
 
+        Args:
+            force: 是否略過連線快取，一定向伺服器重新確認試算表與工作表
+
         Returns:
             連線是否成功
         """
@@ -58,20 +176,23 @@ class GoogleSheetsClient:
             # 檢查是否需要重新連線
             current_time = time.time()
             if (
-                self.client is not None
+                not force
+                and self.worksheet is not None
                 and current_time - self._last_connection_time < self._connection_timeout
             ):
                 return True
 
             logger.info("正在連線到 Google Sheets...")
 
-            # 建立憑證
-            credentials = Credentials.from_service_account_file(
-                self.credentials_file, scopes=self.SCOPES
-            )
+            credentials = self._get_credentials()
+            if credentials.expired or credentials.token is None:
+                # 只更新 OAuth token，不重新讀取金鑰檔，也保留既有的 TCP/TLS 連線
+                credentials.refresh(Request())
 
-            # 建立客戶端
-            self.client = gspread.authorize(credentials)
+            if self.client is None:
+                # 建立共用連線池的 session，客戶端只建立一次
+                self._session = self._create_session(credentials)
+                self.client = gspread.Client(auth=credentials, session=self._session)
 
             # 開啟試算表
             self.spreadsheet = self.client.open_by_url(self.spreadsheet_url)
@@ -88,6 +209,7 @@ class GoogleSheetsClient:
                 self._setup_headers()
 
             self._last_connection_time = current_time
+            self._values_cache = None
             logger.info("Google Sheets 連線成功")
             return True
 
@@ -98,94 +220,226 @@ class GoogleSheetsClient:
             logger.error(f"連線到 Google Sheets 失敗: {e}")
             return False
 
+    def _get_credentials(self) -> Credentials:
+        """取得服務帳戶憑證（金鑰檔只在第一次使用時讀取與解析）"""
+        if self._credentials is None:
+            self._credentials = Credentials.from_service_account_file(
+                self.credentials_file, scopes=self.SCOPES
+            )
+        return self._credentials
+
+    @staticmethod
+    def _create_session(credentials: Credentials) -> AuthorizedSession:
+        """建立具連線池與連線錯誤重試的已授權 session"""
+        session = AuthorizedSession(credentials)
+        # 這一層只重試連線/讀取錯誤；429 與 5xx 狀態碼交由 _api_retry 處理，
+        # 以免 urllib3 重試用盡後拋出 RetryError，使 Retry-After 與退避失效
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(
+                total=3,
+                connect=3,
+                read=3,
+                status=0,
+                backoff_factor=0.5,
+                respect_retry_after_header=False,
+                raise_on_status=False,
+            ),
+        )
+        session.mount("https://", adapter)
+        return session
+
+    def _cached_values(self) -> List[List[str]]:
+        """取得工作表所有資料（短時間內的重複讀取使用快取）"""
+        now = time.time()
+        if self._values_cache is not None:
+            cached_time, values = self._values_cache
+            if now - cached_time < self._values_ttl:
+                return values
+
+        values = self._call_with_retry(self.worksheet.get_all_values)
+        self._values_cache = (now, values)
+        return values
+
     def _setup_headers(self) -> None:
         """設定表頭"""
         try:
-            headers = [
-                "時間戳記",
-                "CPU使用率(%)",
-                "RAM使用率(%)",
-                "RAM使用量(GB)",
-                "RAM總量(GB)",
-                "網路上傳(MB/s)",
-                "網路下載(MB/s)",
-                "目錄內容",
-                "電池電量(%)",
-                "電池狀態",
-                "系統運行時間(小時)",
-                "磁碟使用率(%)",
-                "磁碟可用空間(GB)",
-            ]
-
-            self.worksheet.append_row(headers)
+            # 直接寫入已知範圍，RAW 模式可省去伺服器端的公式解析
+            self.worksheet.update(
+                range_name="A1",
+                values=[list(self.HEADERS)],
+                value_input_option="RAW",
+            )
+            self._values_cache = None
             logger.info("已設定表頭")
 
         except Exception as e:
             logger.error(f"設定表頭失敗: {e}")
 
     def upload_system_data(
-        self, system_info: Dict[str, Any], directory_contents: str = ""
+        self, snapshot: SystemSnapshot, directory_contents: str = ""
     ) -> bool:
         """
         上傳系統資料到 Google Sheets
 
         Args:
-            system_info: 系統資訊
+            snapshot: 單次收集的系統資訊
             directory_contents: 目錄內容字串
 
         Returns:
-            上傳是否成功
+            是否成功（資料只加入緩衝區時為 True；觸發上傳時為上傳是否成功）。
+            資料是否已實際送出請見 pending_count。
         """
         try:
-            if not self.connect():
-                return False
-
-            # 準備資料列
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-            # 取得各項資訊
-            cpu_usage = system_info.get("cpu_usage", 0)
-            memory = system_info.get("memory", {})
-            internet = system_info.get("internet", {})
-            battery = system_info.get("battery", {})
-            uptime = system_info.get("uptime", {})
-            disk = system_info.get("disk", {})
+            # 每次上傳另外計算的欄位
+            if snapshot.power_plugged:
+                battery_status = "充電中"
+            elif snapshot.has_battery:
+                battery_status = "使用電池"
+            else:
+                battery_status = "無電池"
+
+            extras = {
+                "_timestamp": datetime.now().strftime(TIMESTAMP_FORMAT),
+                "_directory_contents": directory_contents,
+                "_battery_percent": (
+                    snapshot.battery_pct if snapshot.has_battery else "N/A"
+                ),
+                "_battery_status": battery_status,
+            }
 
-            # 建立資料列
+            # 依欄位規格建立資料列
             row_data = [
-                timestamp,
-                cpu_usage,
-                memory.get("usage_percent", 0),
-                memory.get("used_gb", 0),
-                memory.get("total_gb", 0),
-                internet.get("mb_sent_per_sec", 0),
-                internet.get("mb_recv_per_sec", 0),
-                directory_contents,
-                battery.get("percent", 0)
-                if battery.get("has_battery", False)
-                else "N/A",
-                "充電中"
-                if battery.get("power_plugged", False)
-                else "使用電池"
-                if battery.get("has_battery", False)
-                else "無電池",
-                uptime.get("uptime_hours", 0),
-                disk.get("usage_percent", 0),
-                disk.get("free_gb", 0),
+                extras[name] if name in extras else getattr(snapshot, name)
+                for name in self._ROW_SPEC
             ]
 
-            # 上傳資料
-            self.worksheet.append_row(row_data)
-
+            # 加入緩衝區，達到數量或時間門檻時批次上傳
+            with self._pending_lock:
+                self._pending_rows.append(row_data)
+                self._trim_pending_rows()
+                pending = len(self._pending_rows)
+                should_flush = (
+                    pending >= self._flush_threshold
+                    or time.time() - self._last_flush_time >= self._flush_interval
+                )
             logger.info(
-                f"成功上傳系統資料: CPU {cpu_usage}%, RAM {memory.get('usage_percent', 0)}%"
+                f"已加入系統資料: CPU {row_data[1]}%, RAM {row_data[2]}% "
+                f"(待上傳 {pending} 筆)"
             )
+
+            if should_flush:
+                # 其他執行緒正在上傳時不等待，資料留在緩衝區由下次上傳送出
+                if self._flush_lock.locked():
+                    return True
+                return self.flush(timeout=0)
             return True
 
         except Exception as e:
             logger.error(f"上傳系統資料失敗: {e}")
             return False
 
+    def set_flush_interval(self, flush_interval: float) -> None:
+        """更新批次上傳的時間門檻（監控間隔變更時使用）"""
+        self._flush_interval = flush_interval
+
+    @property
+    def pending_count(self) -> int:
+        """緩衝區中尚未上傳的資料筆數"""
+        return len(self._pending_rows)
+
+    def _trim_pending_rows(self) -> None:
+        """緩衝區超過上限時捨棄最舊的資料（呼叫端須持有 _pending_lock）"""
+        overflow = len(self._pending_rows) - self._max_pending_rows
+        if overflow > 0:
+            del self._pending_rows[:overflow]
+            logger.warning(
+                f"待上傳資料超過 {self._max_pending_rows} 筆，已捨棄最舊的 {overflow} 筆"
+            )
+
+    def take_pending_rows(self) -> List[List[Any]]:
+        """取出並清空緩衝區中尚未上傳的資料（改用新客戶端時移交用）"""
+        # 等待進行中的上傳結束，避免同一批資料由新舊客戶端各送一次
+        with self._flush_lock, self._pending_lock:
+            rows = self._pending_rows
+            self._pending_rows = []
+        return rows
+
+    def adopt_pending_rows(self, rows: List[List[Any]]) -> None:
+        """將其他客戶端尚未上傳的資料排在緩衝區最前面"""
+        if not rows:
+            return
+        with self._pending_lock:
+            self._pending_rows[:0] = rows
+            self._trim_pending_rows()
+        logger.info(f"已接手 {len(rows)} 筆待上傳資料")
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        將緩衝區中的資料以單次 API 呼叫上傳
+
+        同一時間只有一個執行緒上傳，避免同一批資料被重複寫入；
+        上傳期間不鎖住緩衝區，只在取出資料與移除已送出的資料時短暫鎖定。
+
+        Args:
+            timeout: 等待其他執行緒上傳結束的最長秒數，None 表示一直等待
+
+        Returns:
+            上傳是否成功（失敗或等待逾時時資料保留在緩衝區，下次再試）
+        """
+        if not self._flush_lock.acquire(timeout=-1 if timeout is None else timeout):
+            logger.info("其他執行緒正在上傳，資料保留在緩衝區")
+            return False
+
+        try:
+            with self._pending_lock:
+                rows = list(self._pending_rows)
+            if not rows:
+                return True
+
+            if not self.connect():
+                return False
+            self._append_rows_with_retry(rows)
+
+            # 只移除實際送出的資料；上傳期間新增的資料仍留在緩衝區
+            sent = {id(row) for row in rows}
+            with self._pending_lock:
+                self._pending_rows = [
+                    row for row in self._pending_rows if id(row) not in sent
+                ]
+            self._values_cache = None
+            self._last_flush_time = time.time()
+
+            logger.info(f"成功上傳 {len(rows)} 筆系統資料")
+            return True
+
+        except Exception as e:
+            logger.error(f"批次上傳系統資料失敗: {e}")
+            return False
+        finally:
+            self._flush_lock.release()
+
+    @staticmethod
+    @_api_retry
+    def _call_with_retry(func: Callable[..., Any], *args: Any) -> Any:
+        """呼叫讀取用的 API（暫時性錯誤時自動重試）"""
+        return func(*args)
+
+    @_api_retry
+    def _append_rows_with_retry(self, rows: List[List[Any]]) -> None:
+        """批次附加資料列（暫時性錯誤時自動重試）"""
+        self.worksheet.append_rows(
+            rows,
+            value_input_option="RAW",
+            insert_data_option="INSERT_ROWS",
+        )
+
+    @_api_retry
+    def _batch_update_with_retry(self, requests: List[Dict[str, Any]]) -> None:
+        """送出試算表批次更新請求（暫時性錯誤時自動重試）"""
+        self.spreadsheet.batch_update({"requests": requests})
+
     def get_last_n_rows(self, n: int = 10) -> List[List[str]]:
         """
         取得最後 N 筆資料
@@ -200,12 +454,18 @@ class GoogleSheetsClient:
             if not self.connect():
                 return []
 
-            all_records = self.worksheet.get_all_values()
-            if len(all_records) <= 1:  # 只有表頭或沒有資料
+            # row_count 是格線大小而非資料列數，改以第一欄的長度找出最後一列
+            last_row = len(self._call_with_retry(self.worksheet.col_values, 1))
+            if last_row <= 1:  # 只有表頭或沒有資料
                 return []
 
-            # 回傳最後 N 筆資料（不包含表頭）
-            return all_records[-n:] if len(all_records) > n else all_records[1:]
+            # 只讀取最後 N 筆資料的範圍（不包含表頭）
+            start_row = max(2, last_row - n + 1)
+            return list(
+                self._call_with_retry(
+                    self.worksheet.get, f"A{start_row}:{self._LAST_COLUMN}{last_row}"
+                )
+            )
 
         except Exception as e:
             logger.error(f"取得資料失敗: {e}")
@@ -227,46 +487,66 @@ class GoogleSheetsClient:
 
             from datetime import datetime, timedelta
 
-            all_records = self.worksheet.get_all_values()
+            all_records = self._cached_values()
             if len(all_records) <= 1:
                 return True
 
             # 計算保留的日期界限
             cutoff_date = datetime.now() - timedelta(days=keep_days)
+            cutoff = cutoff_date.strftime(TIMESTAMP_FORMAT)
+
+            # 找出過期資料的列索引（0 起算，索引 0 為表頭）；
+            # 時間戳記為固定格式，直接比較字串即可，不需逐列 strptime。
+            # 日期格式不正確的列予以保留
+            match = _TIMESTAMP_RE.fullmatch
+            stale_indices = [
+                index
+                for index, row in enumerate(all_records[1:], start=1)
+                if row and row[0] < cutoff and match(row[0])
+            ]
 
-            # 找出要保留的資料
-            headers = all_records[0]
-            rows_to_keep = [headers]  # 保留表頭
-
-            for row in all_records[1:]:
-                if len(row) > 0:
-                    try:
-                        row_date = datetime.strptime(row[0], "%Y-%m-%d %H:%M:%S")
-                        if row_date >= cutoff_date:
-                            rows_to_keep.append(row)
-                    except ValueError:
-                        # 如果日期格式不正確，保留該列
-                        rows_to_keep.append(row)
-
-            # 清除工作表並重新寫入資料
-            if len(rows_to_keep) < len(all_records):
-                self.worksheet.clear()
-                if rows_to_keep:
-                    self.worksheet.update(rows_to_keep)
-
-                deleted_count = len(all_records) - len(rows_to_keep)
-                logger.info(f"已清除 {deleted_count} 筆舊資料")
+            if not stale_indices:
+                return True
 
+            # 合併連續的列為區間 [start, end)
+            ranges = []
+            for index in stale_indices:
+                if ranges and ranges[-1][1] == index:
+                    ranges[-1][1] = index + 1
+                else:
+                    ranges.append([index, index + 1])
+
+            # 由下往上刪除，讓前面區間的索引不受影響；全部請求以單次 API 呼叫送出
+            requests = [
+                {
+                    "deleteDimension": {
+                        "range": {
+                            "sheetId": self.worksheet.id,
+                            "dimension": "ROWS",
+                            "startIndex": start,
+                            "endIndex": end,
+                        }
+                    }
+                }
+                for start, end in reversed(ranges)
+            ]
+            self._batch_update_with_retry(requests)
+            self._values_cache = None
+
+            logger.info(f"已清除 {len(stale_indices)} 筆舊資料")
             return True
 
         except Exception as e:
             logger.error(f"清除舊資料失敗: {e}")
             return False
 
-    def test_connection(self) -> Dict[str, Any]:
+    def test_connection(self, force: bool = False) -> Dict[str, Any]:
         """
         測試連線
 
+        Args:
+            force: 是否一定實際連線確認（沿用憑證與 session，但不使用連線快取）
+
         Returns:
             測試結果
         """
@@ -279,7 +559,7 @@ class GoogleSheetsClient:
         }
 
         try:
-            if self.connect():
+            if self.connect(force=force):
                 result["success"] = True
                 result["message"] = "連線成功"
                 result["spreadsheet_title"] = self.spreadsheet.title
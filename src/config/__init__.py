@@ -2,6 +2,6 @@
 配置模組初始化
 """
 
-from .settings import settings, Settings
+from .settings import settings, Settings, MonitorConfig
 
-__all__ = ["settings", "Settings"]
+__all__ = ["settings", "Settings", "MonitorConfig"]
@@ -2,15 +2,46 @@
 配置管理模組
 """
 
+import copy
 import json
 import os
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 from superyngo_logger import init_logger
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # 初始化日誌器
 logger = init_logger(app_name="system_monitor")
 
+# 標記設定路徑不存在
+_MISSING = object()
+
+# 延遲寫入設定檔的秒數，期間內的多次變更合併為一次寫入
+SAVE_DELAY_SECONDS = 0.5
+
+
+@dataclass(frozen=True, slots=True)
+class MonitorConfig:
+    """監控循環常用設定的唯讀快照"""
+
+    credentials_file: str
+    spreadsheet_url: str
+    worksheet_name: str
+    interval_minutes: int
+    monitor_directories: Tuple[str, ...]
+    show_notifications: bool
+
+    @property
+    def interval_seconds(self) -> int:
+        return self.interval_minutes * 60
+
 
 class Settings:
     """系統監控設定管理"""
@@ -18,6 +49,16 @@ class Settings:
     def __init__(self, config_file: str = "config.json"):
         self.config_file = Path(config_file)
         self.config = self._load_default_config()
+        self._version = 0
+        # get() 的快取：(設定版本, {路徑: 值})，版本變更時整份換新
+        self._get_cache: Tuple[int, Dict[str, Any]] = (-1, {})
+        self._snapshot: Optional[MonitorConfig] = None
+        self._snapshot_version = -1
+        self._dirty = False
+        self._batch_depth = 0
+        self._save_timer: Optional[threading.Timer] = None
+        # 可重入：batch() 與計時器寫入在持有鎖時會再呼叫 save()/_cancel_pending_save()
+        self._save_lock = threading.RLock()
         self.load()
 
     def _load_default_config(self) -> Dict[str, Any]:
@@ -53,10 +94,13 @@ class Settings:
         """從檔案載入設定"""
         try:
             if self.config_file.exists():
-                with open(self.config_file, "r", encoding="utf-8") as f:
-                    loaded_config = json.load(f)
-                    # 合併設定，保留預設值
-                    self._merge_config(self.config, loaded_config)
+                if orjson is not None:
+                    loaded_config = orjson.loads(self.config_file.read_bytes())
+                else:
+                    with open(self.config_file, "r", encoding="utf-8") as f:
+                        loaded_config = json.load(f)
+                # 合併設定，保留預設值
+                self._merge_config(self.config, loaded_config)
                 logger.info(f"設定已從 {self.config_file} 載入")
             else:
                 logger.info("設定檔案不存在，使用預設設定")
@@ -67,6 +111,7 @@ class Settings:
 
     def _merge_config(self, default: Dict, loaded: Dict) -> None:
         """遞迴合併設定"""
+        self._version += 1
         for key, value in loaded.items():
             if key in default:
                 if isinstance(default[key], dict) and isinstance(value, dict):
@@ -76,38 +121,129 @@ class Settings:
 
     def save(self) -> None:
         """儲存設定到檔案"""
+        with self._save_lock:
+            self._cancel_pending_save()
+            try:
+                if orjson is not None:
+                    self.config_file.write_bytes(
+                        orjson.dumps(self.config, option=orjson.OPT_INDENT_2)
+                    )
+                else:
+                    with open(self.config_file, "w", encoding="utf-8") as f:
+                        json.dump(self.config, f, indent=2, ensure_ascii=False)
+                self._dirty = False
+                logger.info(f"設定已儲存到 {self.config_file}")
+            except Exception as e:
+                logger.error(f"儲存設定失敗: {e}")
+
+    def _schedule_save(self) -> None:
+        """標記設定已變更，並在短暫延遲後寫入檔案"""
+        with self._save_lock:
+            self._dirty = True
+            if self._batch_depth:
+                return
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+            self._save_timer = threading.Timer(
+                SAVE_DELAY_SECONDS, self._flush_pending_save
+            )
+            self._save_timer.start()
+
+    def _flush_pending_save(self) -> None:
+        """延遲計時器到期時寫入尚未儲存的變更"""
+        with self._save_lock:
+            self._save_timer = None
+            # 批次修改進行中時不寫入半套設定，由 batch() 結束時統一儲存
+            if self._dirty and not self._batch_depth:
+                self.save()
+
+    def _cancel_pending_save(self) -> None:
+        """取消尚未執行的延遲寫入"""
+        with self._save_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+
+    @contextmanager
+    def batch(self) -> Iterator["Settings"]:
+        """批次修改設定，離開區塊時才寫入一次檔案"""
+        with self._save_lock:
+            self._batch_depth += 1
+            # 進入批次前已排定的延遲寫入不能在批次中途觸發
+            self._cancel_pending_save()
         try:
-            with open(self.config_file, "w", encoding="utf-8") as f:
-                json.dump(self.config, f, indent=2, ensure_ascii=False)
-            logger.info(f"設定已儲存到 {self.config_file}")
-        except Exception as e:
-            logger.error(f"儲存設定失敗: {e}")
+            yield self
+        finally:
+            with self._save_lock:
+                self._batch_depth -= 1
+                outermost = self._batch_depth == 0
+            if outermost and self._dirty:
+                self.save()
 
     def get(self, key_path: str, default: Any = None) -> Any:
-        """取得設定值（支援點記法路徑）"""
-        keys = key_path.split(".")
+        """
+        取得設定值（支援點記法路徑）
+
+        結果依設定版本快取；字典與清單回傳複本，呼叫端修改不會影響設定或快取
+        """
+        version = self._version
+        cache_version, cache = self._get_cache
+        if cache_version != version:
+            cache = {}
+            self._get_cache = (version, cache)
+
+        value = cache.get(key_path, _MISSING)
+        if value is _MISSING and key_path not in cache:
+            value = cache[key_path] = self._resolve(key_path)
+
+        if value is _MISSING:
+            return default
+        if isinstance(value, (dict, list)):
+            return copy.deepcopy(value)
+        return value
+
+    def _resolve(self, key_path: str) -> Any:
+        """解析點記法路徑，不存在時回傳 _MISSING"""
         value = self.config
 
         try:
-            for key in keys:
+            for key in key_path.split("."):
                 value = value[key]
             return value
         except (KeyError, TypeError):
-            return default
+            return _MISSING
 
     def set(self, key_path: str, value: Any) -> None:
         """設定值（支援點記法路徑）"""
         keys = key_path.split(".")
-        config = self.config
-
-        # 建立巢狀字典結構
-        for key in keys[:-1]:
-            if key not in config:
-                config[key] = {}
-            config = config[key]
 
-        config[keys[-1]] = value
-        self.save()
+        # 與計時器的延遲寫入互斥，避免寫入檔案時設定正被修改
+        with self._save_lock:
+            config = self.config
+
+            # 建立巢狀字典結構
+            for key in keys[:-1]:
+                if key not in config:
+                    config[key] = {}
+                config = config[key]
+
+            config[keys[-1]] = value
+            self._version += 1
+            self._schedule_save()
+
+    def snapshot(self) -> MonitorConfig:
+        """取得常用設定的快照（設定未變更時重複使用同一份）"""
+        if self._snapshot is None or self._snapshot_version != self._version:
+            self._snapshot = MonitorConfig(
+                credentials_file=self.credentials_file,
+                spreadsheet_url=self.spreadsheet_url,
+                worksheet_name=self.worksheet_name,
+                interval_minutes=self.interval_minutes,
+                monitor_directories=tuple(self.monitor_directories or ()),
+                show_notifications=bool(self.get("ui.show_notifications", True)),
+            )
+            self._snapshot_version = self._version
+        return self._snapshot
 
     # 便利方法
     @property
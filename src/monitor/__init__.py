@@ -2,7 +2,13 @@
 監控模組初始化
 """
 
-from .system_info import SystemInfoCollector
-from .file_scanner import FileScanner
+from .system_info import SystemInfoCollector, SystemSnapshot
+from .file_scanner import FileScanner, FileEntry, DirectoryEntry
 
-__all__ = ["SystemInfoCollector", "FileScanner"]
+__all__ = [
+    "SystemInfoCollector",
+    "SystemSnapshot",
+    "FileScanner",
+    "FileEntry",
+    "DirectoryEntry",
+]
@@ -2,6 +2,12 @@
 檔案掃描模組
 """
 
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
 from typing import List, Dict, Union, Optional, Any
 from datetime import datetime
@@ -11,29 +17,92 @@ from superyngo_logger import init_logger
 logger = init_logger(app_name="system_monitor")
 
 
+def _fmt_ts(ts: float) -> str:
+    """將時間戳記格式化為本地時間 ISO 字串（不建立 datetime 物件）"""
+    tm = time.localtime(ts)
+    return (
+        f"{tm.tm_year:04d}-{tm.tm_mon:02d}-{tm.tm_mday:02d}"
+        f"T{tm.tm_hour:02d}:{tm.tm_min:02d}:{tm.tm_sec:02d}"
+    )
+
+
+@dataclass(slots=True)
+class FileEntry:
+    """檔案項目（只保留原始數值，格式化欄位於需要時才計算）"""
+
+    name: str
+    path: str
+    size: int
+    mtime: float
+    ctime: float
+    ext: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        """轉換為含格式化欄位的字典"""
+        return {
+            "name": self.name,
+            "path": self.path,
+            "size_bytes": self.size,
+            "size_kb": round(self.size / 1024, 2),
+            "size_mb": round(self.size / (1024 * 1024), 4),
+            "modified_time": _fmt_ts(self.mtime),
+            "created_time": _fmt_ts(self.ctime),
+            "extension": self.ext,
+        }
+
+
+@dataclass(slots=True)
+class DirectoryEntry:
+    """目錄項目（只保留原始數值，格式化欄位於需要時才計算）"""
+
+    name: str
+    path: str
+    mtime: float
+    ctime: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        """轉換為含格式化欄位的字典"""
+        return {
+            "name": self.name,
+            "path": self.path,
+            "modified_time": _fmt_ts(self.mtime),
+            "created_time": _fmt_ts(self.ctime),
+        }
+
+
 class FileScanner:
     """檔案掃描器"""
 
-    def __init__(self, max_depth: int = 3, max_files_per_dir: int = 100):
+    def __init__(
+        self,
+        max_depth: int = 3,
+        max_files_per_dir: int = 100,
+        cross_device: bool = False,
+    ):
         """
         初始化檔案掃描器
 
         Args:
             max_depth: 最大掃描深度
             max_files_per_dir: 每個目錄最大檔案數量
+            cross_device: 是否進入位於其他裝置的子目錄（掛載點、網路磁碟）
         """
         self.max_depth = max_depth
         self.max_files_per_dir = max_files_per_dir
+        self.cross_device = cross_device
         logger.info(
             f"檔案掃描器初始化完成 (深度: {max_depth}, 每目錄最大檔案數: {max_files_per_dir})"
         )
 
-    def scan_directory(self, directory_path: str) -> Dict[str, Any]:
+    def scan_directory(
+        self, directory_path: str, summary_only: bool = True
+    ) -> Dict[str, Any]:
         """
         掃描指定目錄
 
         Args:
             directory_path: 目錄路徑
+            summary_only: 只累計總數，不建立 files/subdirectories 明細
 
         Returns:
             目錄資訊字典
@@ -72,8 +141,8 @@ class FileScanner:
                 "subdirectories": [],
             }
 
-            # 遞迴掃描
-            self._scan_recursive(path, directory_info, 0)
+            # 逐層掃描
+            self._scan_iter(directory_path, directory_info, summary_only)
 
             # 格式化大小
             directory_info["total_size_mb"] = round(
@@ -104,134 +173,168 @@ class FileScanner:
                 "scan_time": datetime.now().isoformat(),
             }
 
-    def _scan_recursive(
-        self, path: Path, info: Dict[str, Any], current_depth: int
+    def _scan_iter(
+        self, root: str, info: Dict[str, Any], summary_only: bool = True
     ) -> None:
         """
-        遞迴掃描目錄
+        以廣度優先方式逐層掃描目錄
+
+        非摘要模式下，根目錄下的項目會記錄到 files/subdirectories 清單，
+        其餘項目僅累計到統計數字中。
 
         Args:
-            path: 當前路徑
+            root: 根目錄路徑
             info: 資訊字典
-            current_depth: 當前深度
+            summary_only: 只累計總數
         """
-        if current_depth >= self.max_depth:
-            return
-
-        try:
-            items = list(path.iterdir())
-            files_count = 0
-
-            for item in items:
-                if files_count >= self.max_files_per_dir:
-                    logger.debug(f"達到檔案數量限制，跳過剩餘項目: {path}")
-                    break
-
-                try:
-                    if item.is_file():
-                        file_info = self._get_file_info(item)
-                        if file_info:
-                            info["files"].append(file_info)
-                            info["total_files"] += 1
-                            info["total_size_bytes"] += file_info.get("size_bytes", 0)
-                            files_count += 1
-
-                    elif item.is_dir():
-                        dir_info = self._get_directory_info(item)
-                        if dir_info:
-                            info["subdirectories"].append(dir_info)
-                            info["total_directories"] += 1
-
-                            # 遞迴掃描子目錄
-                            if current_depth < self.max_depth - 1:
-                                subdir_info = {
-                                    "total_files": 0,
-                                    "total_directories": 0,
-                                    "total_size_bytes": 0,
-                                    "files": [],
-                                    "subdirectories": [],
-                                }
-                                self._scan_recursive(
-                                    item, subdir_info, current_depth + 1
-                                )
-
-                                # 合併統計
-                                info["total_files"] += subdir_info["total_files"]
-                                info["total_directories"] += subdir_info[
-                                    "total_directories"
-                                ]
-                                info["total_size_bytes"] += subdir_info[
-                                    "total_size_bytes"
-                                ]
-
-                except (PermissionError, OSError) as e:
-                    logger.debug(f"跳過無法存取的項目 {item}: {e}")
-                    continue
+        root_dev = None if self.cross_device else os.stat(root).st_dev
+        queue = deque([(root, 0)])
 
-        except (PermissionError, OSError) as e:
-            logger.debug(f"無法列出目錄內容 {path}: {e}")
+        while queue:
+            path, depth = queue.popleft()
+            collect = depth == 0 and not summary_only
 
-    def _get_file_info(self, file_path: Path) -> Optional[Dict[str, Any]]:
+            try:
+                with os.scandir(path) as it:
+                    files_count = 0
+
+                    for entry in it:
+                        if files_count >= self.max_files_per_dir:
+                            logger.debug(f"達到檔案數量限制，跳過剩餘項目: {path}")
+                            break
+
+                        try:
+                            # DirEntry 的型別判斷與 stat 結果皆有快取，不需另外呼叫 stat
+                            if entry.is_file(follow_symlinks=False):
+                                if collect:
+                                    file_info = self._get_file_info(entry)
+                                    if not file_info:
+                                        continue
+                                    info["files"].append(file_info)
+                                    size = file_info.size
+                                else:
+                                    size = entry.stat(follow_symlinks=False).st_size
+                                info["total_files"] += 1
+                                info["total_size_bytes"] += size
+                                files_count += 1
+
+                            elif entry.is_dir(follow_symlinks=False):
+                                if collect:
+                                    dir_info = self._get_directory_info(entry)
+                                    if not dir_info:
+                                        continue
+                                    info["subdirectories"].append(dir_info)
+                                info["total_directories"] += 1
+
+                                # 子目錄排入佇列稍後掃描（預設不跨越到其他裝置）
+                                if depth < self.max_depth - 1 and (
+                                    root_dev is None
+                                    or self._entry_device(entry) == root_dev
+                                ):
+                                    queue.append((entry.path, depth + 1))
+
+                        except (PermissionError, OSError) as e:
+                            logger.debug(f"跳過無法存取的項目 {entry.path}: {e}")
+                            continue
+
+            except (PermissionError, OSError) as e:
+                logger.debug(f"無法列出目錄內容 {path}: {e}")
+
+    @staticmethod
+    def _entry_device(entry: os.DirEntry) -> int:
+        """取得項目所在的裝置編號"""
+        st_dev = entry.stat(follow_symlinks=False).st_dev
+        if st_dev:
+            return st_dev
+        # Windows 上 DirEntry.stat() 不提供 st_dev，需另外呼叫 lstat
+        return os.lstat(entry.path).st_dev
+
+    def _get_file_info(self, entry: os.DirEntry) -> Optional[FileEntry]:
         """取得檔案資訊"""
         try:
-            stat = file_path.stat()
-            file_info = {
-                "name": file_path.name,
-                "path": str(file_path),
-                "size_bytes": stat.st_size,
-                "size_kb": round(stat.st_size / 1024, 2),
-                "size_mb": round(stat.st_size / (1024 * 1024), 4),
-                "modified_time": datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                "created_time": datetime.fromtimestamp(stat.st_ctime).isoformat(),
-                "extension": file_path.suffix.lower(),
-            }
-            return file_info
+            stat = entry.stat(follow_symlinks=False)
+            return FileEntry(
+                name=entry.name,
+                path=entry.path,
+                size=stat.st_size,
+                mtime=stat.st_mtime,
+                ctime=stat.st_ctime,
+                # 相同副檔名共用同一個字串物件
+                ext=sys.intern(os.path.splitext(entry.name)[1].lower()),
+            )
         except (PermissionError, OSError) as e:
-            logger.debug(f"無法取得檔案資訊 {file_path}: {e}")
+            logger.debug(f"無法取得檔案資訊 {entry.path}: {e}")
             return None
 
-    def _get_directory_info(self, dir_path: Path) -> Optional[Dict[str, Any]]:
+    def _get_directory_info(self, entry: os.DirEntry) -> Optional[DirectoryEntry]:
         """取得目錄資訊"""
         try:
-            stat = dir_path.stat()
-            dir_info = {
-                "name": dir_path.name,
-                "path": str(dir_path),
-                "modified_time": datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                "created_time": datetime.fromtimestamp(stat.st_ctime).isoformat(),
-            }
-            return dir_info
+            stat = entry.stat(follow_symlinks=False)
+            return DirectoryEntry(
+                name=entry.name,
+                path=entry.path,
+                mtime=stat.st_mtime,
+                ctime=stat.st_ctime,
+            )
         except (PermissionError, OSError) as e:
-            logger.debug(f"無法取得目錄資訊 {dir_path}: {e}")
+            logger.debug(f"無法取得目錄資訊 {entry.path}: {e}")
             return None
 
     def scan_multiple_directories(
-        self, directories: List[str]
+        self, directories: List[str], summary_only: bool = True
     ) -> Dict[str, Dict[str, Any]]:
         """
         掃描多個目錄
 
         Args:
             directories: 目錄路徑清單
+            summary_only: 只累計總數，不建立 files/subdirectories 明細
 
         Returns:
             每個目錄的掃描結果
         """
-        results = {}
+        results: Dict[str, Dict[str, Any]] = {}
+        if not directories:
+            return results
+
+        # 目錄列舉以 I/O 為主，不同裝置上的根目錄平行掃描；
+        # 執行緒數量依裝置數決定，每個根目錄各自累計，不需加鎖
+        max_workers = min(8, self._count_devices(directories))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(self._scan_directory_safe, directory, summary_only)
+                for directory in directories
+            ]
+            for directory, future in zip(directories, futures):
+                results[directory] = future.result()
+
+        return results
 
+    @staticmethod
+    def _count_devices(directories: List[str]) -> int:
+        """計算目錄分布在幾個不同的裝置上（無法存取的目錄各自算一個）"""
+        devices = set()
         for directory in directories:
             try:
-                logger.info(f"開始掃描目錄: {directory}")
-                results[directory] = self.scan_directory(directory)
-            except Exception as e:
-                logger.error(f"掃描目錄失敗 {directory}: {e}")
-                results[directory] = {
-                    "path": directory,
-                    "error": str(e),
-                    "scan_time": datetime.now().isoformat(),
-                }
-
-        return results
+                devices.add(os.stat(directory).st_dev)
+            except OSError:
+                devices.add(directory)
+        return max(1, len(devices))
+
+    def _scan_directory_safe(
+        self, directory: str, summary_only: bool = True
+    ) -> Dict[str, Any]:
+        """掃描單一目錄，例外時回傳錯誤資訊"""
+        try:
+            logger.info(f"開始掃描目錄: {directory}")
+            return self.scan_directory(directory, summary_only)
+        except Exception as e:
+            logger.error(f"掃描目錄失敗 {directory}: {e}")
+            return {
+                "path": directory,
+                "error": str(e),
+                "scan_time": datetime.now().isoformat(),
+            }
 
     def get_summary(
         self, scan_results: Dict[str, Dict[str, Any]]
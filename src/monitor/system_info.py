@@ -2,14 +2,138 @@
 系統資訊收集模組
 """
 
+import logging
 import psutil
+import threading
 import time
-from typing import Dict, Union, Any
+from array import array
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple, Union
 from superyngo_logger import init_logger
 
 # 初始化日誌器
 logger = init_logger(app_name="system_monitor")
 
+# 兩次 CPU 取樣的最短間隔（秒），間隔太短的結果不準確，直接沿用上次的值
+CPU_MIN_INTERVAL = 0.1
+
+# CPU、記憶體、網路計數與開機時間一次讀取後共用的秒數
+SNAPSHOT_TTL = 1.0
+
+# 各項資訊的快取秒數，依資料變化速度設定；期限內重複呼叫直接回傳快取結果
+MEMORY_TTL = 2.0
+DISK_TTL = 5.0
+NET_TTL = 1.0
+UPTIME_TTL = 30.0
+BATTERY_TTL = 30.0
+# 偵測不到電池後，重新偵測的間隔秒數（例如之後才接上 USB UPS）
+BATTERY_REPROBE_INTERVAL = 300.0
+INTERFACE_TTL = 60.0
+
+# 平行收集各項資訊時，等待單一輪收集完成的最長秒數
+COLLECT_TIMEOUT = 5.0
+
+# 各項資訊無法取得時使用的預設值
+# 以唯讀的 MappingProxyType 共用同一個物件，錯誤路徑不必每次配置新字典；
+# 呼叫端若需要修改結果，必須先自行複製（例如 dict(result)）
+_MEMORY_FALLBACK = MappingProxyType(
+    {"total_gb": 0, "used_gb": 0, "available_gb": 0, "usage_percent": 0}
+)
+_INTERNET_FALLBACK = MappingProxyType(
+    {
+        "bytes_sent_per_sec": 0.0,
+        "bytes_recv_per_sec": 0.0,
+        "mb_sent_per_sec": 0.0,
+        "mb_recv_per_sec": 0.0,
+        "interface": "unknown",
+    }
+)
+_DISK_FALLBACK = MappingProxyType(
+    {"total_gb": 0, "used_gb": 0, "free_gb": 0, "usage_percent": 0}
+)
+_UPTIME_FALLBACK = MappingProxyType(
+    {
+        "uptime_seconds": 0,
+        "uptime_minutes": 0,
+        "uptime_hours": 0,
+        "uptime_days": 0,
+        "boot_time": 0,
+    }
+)
+_BATTERY_FALLBACK = MappingProxyType(
+    {
+        "has_battery": False,
+        "percent": 0.0,
+        "power_plugged": False,
+        "time_left": "N/A",
+    }
+)
+
+# 單位換算倍數（以乘法取代每次呼叫時的除法）
+_INV_GB = 1.0 / (1024**3)
+_INV_MB = 1.0 / (1024 * 1024)
+_INV_60 = 1 / 60.0
+_INV_3600 = 1 / 3600.0
+_INV_86400 = 1 / 86400.0
+
+
+@dataclass(slots=True)
+class _Snap:
+    """一次讀取的 psutil 原始數值，供各 get_* 方法格式化"""
+
+    mono: float
+    cpu_pct: float
+    vmem: Any
+    net_io: array
+    boot_time: float
+
+
+@dataclass(slots=True)
+class SystemSnapshot:
+    """單次收集的系統資訊（扁平欄位，只包含上傳與通知用到的數值）"""
+
+    ts: float
+    cpu_pct: float
+    mem_pct: float
+    mem_used_gb: float
+    mem_total_gb: float
+    net_mb_sent_per_sec: float
+    net_mb_recv_per_sec: float
+    disk_pct: float
+    disk_free_gb: float
+    uptime_hours: float
+    has_battery: bool
+    battery_pct: float
+    power_plugged: bool
+
+    def as_dict(self) -> Dict[str, Any]:
+        """轉換為 get_all_system_info 格式的巢狀字典（供仍使用字典格式的舊呼叫端）"""
+        return {
+            "timestamp": self.ts,
+            "cpu_usage": self.cpu_pct,
+            "memory": {
+                "usage_percent": self.mem_pct,
+                "used_gb": self.mem_used_gb,
+                "total_gb": self.mem_total_gb,
+            },
+            "internet": {
+                "mb_sent_per_sec": self.net_mb_sent_per_sec,
+                "mb_recv_per_sec": self.net_mb_recv_per_sec,
+            },
+            "disk": {
+                "usage_percent": self.disk_pct,
+                "free_gb": self.disk_free_gb,
+            },
+            "uptime": {"uptime_hours": self.uptime_hours},
+            "battery": {
+                "has_battery": self.has_battery,
+                "percent": self.battery_pct,
+                "power_plugged": self.power_plugged,
+            },
+        }
+
 
 class SystemInfoCollector:
     """系統資訊收集器"""
@@ -17,61 +141,152 @@ class SystemInfoCollector:
     def __init__(self):
         self._last_net_io = None
         self._last_net_time = None
-        self._net_interface = self._get_primary_interface()
+        self._cache: Dict[str, Tuple[float, Any]] = {}
+        self._disk_cache: Dict[str, Tuple[float, Mapping[str, Any]]] = {}
+        self._disk_fallbacks: Dict[str, Mapping[str, Any]] = {}
+        self._snap: Optional[_Snap] = None
+        self._snap_lock = threading.Lock()
+
+        # 是否有電池：None 表示尚未偵測；沒有電池時到期前不再查詢
+        self._has_battery: Optional[bool] = None
+        self._battery_reprobe_at = 0.0
+
+        # 各項資訊以常駐執行緒池平行收集；逾時的項目沿用上次成功的結果
+        # 每項資訊最多只有一個執行中的工作，執行緒數量與項目數相同，卡住的項目不會佔用其他項目的執行緒
+        self._metric_tasks: Dict[str, Tuple[Callable[[], Any], Mapping[str, Any]]] = {
+            "memory": (self.get_memory_usage, _MEMORY_FALLBACK),
+            "internet": (self.get_internet_usage, _INTERNET_FALLBACK),
+            "disk": (self.get_disk_usage, self._disk_fallback("C:\\")),
+            "uptime": (self.get_system_uptime, _UPTIME_FALLBACK),
+            "battery": (self.get_battery_info, _BATTERY_FALLBACK),
+        }
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(self._metric_tasks), thread_name_prefix="sysinfo"
+        )
+        self._pending_futures: Dict[str, Future] = {}
+        self._collect_lock = threading.Lock()
+        self._last_results: Dict[str, Any] = {}
+
+        # 非阻塞的 CPU 取樣：先初始化 psutil 的計數基準，之後每次回傳與上次呼叫之間的平均值
+        psutil.cpu_percent(interval=None)
+        self._last_cpu_call = time.monotonic()
         logger.info("系統資訊收集器初始化完成")
 
+    def _cached(self, name: str, ttl: float, fn: Callable[[], Any]) -> Any:
+        """在 ttl 秒內重複呼叫時回傳快取結果，否則重新取得"""
+        now = time.monotonic()
+        entry = self._cache.get(name)
+        if entry is not None and now < entry[0]:
+            return entry[1]
+
+        value = fn()
+        self._cache[name] = (now + ttl, value)
+        return value
+
+    def _snapshot(self) -> _Snap:
+        """
+        一次讀取 CPU、記憶體、網路計數與開機時間
+
+        SNAPSHOT_TTL 秒內的呼叫共用同一份結果，各 get_* 方法只負責格式化，
+        不再各自查詢 psutil。電池與磁碟可能阻塞或依路徑而異，仍各自查詢。
+        """
+        with self._snap_lock:
+            now = time.monotonic()
+            snap = self._snap
+            if snap is not None and now - snap.mono < SNAPSHOT_TTL:
+                return snap
+
+            # 與上次取樣間隔太短時 CPU 使用率不準確，沿用上次的值
+            if now - self._last_cpu_call < CPU_MIN_INTERVAL:
+                cpu_pct = snap.cpu_pct if snap is not None else 0.0
+            else:
+                cpu_pct = psutil.cpu_percent(interval=None)
+                self._last_cpu_call = now
+
+            counters = psutil.net_io_counters()
+            snap = self._snap = _Snap(
+                mono=now,
+                cpu_pct=cpu_pct,
+                vmem=psutil.virtual_memory(),
+                net_io=array("Q", (counters.bytes_sent, counters.bytes_recv)),
+                boot_time=psutil.boot_time(),
+            )
+            return snap
+
+    @property
+    def _net_interface(self) -> str:
+        """主要網路介面（定期重新偵測以反映網卡變更）"""
+        return self._cached("interface", INTERFACE_TTL, self._get_primary_interface)
+
     def _get_primary_interface(self) -> str:
         """取得主要網路介面"""
         try:
+            # 介面位址與狀態各只查詢一次
+            addrs_map = psutil.net_if_addrs()
+            stats_map = psutil.net_if_stats()
+
             # 取得預設路由的網路介面
-            for interface, addrs in psutil.net_if_addrs().items():
+            for interface, addrs in addrs_map.items():
                 for addr in addrs:
                     if addr.family == 2 and not addr.address.startswith(
                         "127."
                     ):  # IPv4, not localhost
-                        stats = psutil.net_if_stats().get(interface)
+                        stats = stats_map.get(interface)
                         if stats and stats.isup:
                             return interface
-            return (
-                list(psutil.net_if_addrs().keys())[0] if psutil.net_if_addrs() else ""
-            )
+            return next(iter(addrs_map), "")
         except Exception as e:
             logger.warning(f"無法偵測主要網路介面: {e}")
             return ""
 
     def get_cpu_usage(self) -> float:
-        """取得 CPU 使用率（百分比）"""
+        """
+        取得 CPU 使用率（百分比）
+
+        回傳自上次取樣以來的平均使用率，不會阻塞；
+        SNAPSHOT_TTL 秒內的呼叫共用同一次取樣。
+        """
         try:
-            # 第一次呼叫會回傳 0.0，所以我們呼叫兩次
-            psutil.cpu_percent(interval=None)  # 非阻塞呼叫初始化
-            cpu_usage = psutil.cpu_percent(interval=1.0)  # 1秒間隔測量
-            logger.debug(f"CPU 使用率: {cpu_usage}%")
-            return round(cpu_usage, 2)
+            cpu_usage = round(self._snapshot().cpu_pct, 2)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("CPU 使用率: %s%%", cpu_usage)
+            return cpu_usage
         except Exception as e:
             logger.error(f"取得 CPU 使用率失敗: {e}")
             return 0.0
 
-    def get_memory_usage(self) -> Dict[str, Union[float, int]]:
+    def get_memory_usage(self) -> Mapping[str, Union[float, int]]:
         """取得記憶體使用情況"""
+        return self._cached("memory", MEMORY_TTL, self._raw_memory_usage)
+
+    def _raw_memory_usage(self) -> Mapping[str, Union[float, int]]:
+        """取得記憶體使用情況（格式化共用的快照）"""
         try:
-            memory = psutil.virtual_memory()
+            memory = self._snapshot().vmem
             memory_info = {
-                "total_gb": round(memory.total / (1024**3), 2),
-                "used_gb": round(memory.used / (1024**3), 2),
-                "available_gb": round(memory.available / (1024**3), 2),
-                "usage_percent": round(memory.percent, 2),
+                "total_gb": round(memory.total * _INV_GB, 2),
+                "used_gb": round(memory.used * _INV_GB, 2),
+                "available_gb": round(memory.available * _INV_GB, 2),
+                "usage_percent": memory.percent,
             }
-            logger.debug(f"記憶體使用情況: {memory_info}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("記憶體使用情況: %s", memory_info)
             return memory_info
         except Exception as e:
             logger.error(f"取得記憶體使用情況失敗: {e}")
-            return {"total_gb": 0, "used_gb": 0, "available_gb": 0, "usage_percent": 0}
+            return _MEMORY_FALLBACK
 
-    def get_internet_usage(self) -> Dict[str, Union[float, str]]:
+    def get_internet_usage(self) -> Mapping[str, Union[float, str]]:
         """取得網路使用情況"""
+        return self._cached("internet", NET_TTL, self._raw_internet_usage)
+
+    def _raw_internet_usage(self) -> Mapping[str, Union[float, str]]:
+        """取得網路使用情況（格式化共用的快照）"""
         try:
-            current_time = time.time()
-            net_io = psutil.net_io_counters()
+            # 快照時間使用單調時鐘，避免系統校時造成時間差為負或異常大
+            snap = self._snapshot()
+            current_time = snap.mono
+            net_io = snap.net_io
 
             if self._last_net_io is None or self._last_net_time is None:
                 # 第一次呼叫，儲存初始值
@@ -87,99 +302,128 @@ class SystemInfoCollector:
 
             # 計算時間差和流量差
             time_diff = current_time - self._last_net_time
-            bytes_sent_diff = net_io.bytes_sent - self._last_net_io.bytes_sent
-            bytes_recv_diff = net_io.bytes_recv - self._last_net_io.bytes_recv
+            bytes_sent_diff = net_io[0] - self._last_net_io[0]
+            bytes_recv_diff = net_io[1] - self._last_net_io[1]
 
             # 計算每秒流量
-            bytes_sent_per_sec = bytes_sent_diff / time_diff if time_diff > 0 else 0
-            bytes_recv_per_sec = bytes_recv_diff / time_diff if time_diff > 0 else 0
+            inv_dt = 1.0 / time_diff if time_diff > 0 else 0.0
+            bytes_sent_per_sec = bytes_sent_diff * inv_dt
+            bytes_recv_per_sec = bytes_recv_diff * inv_dt
 
             # 更新上次記錄
             self._last_net_io = net_io
             self._last_net_time = current_time
 
             internet_usage = {
-                "bytes_sent_per_sec": round(bytes_sent_per_sec, 2),
-                "bytes_recv_per_sec": round(bytes_recv_per_sec, 2),
-                "mb_sent_per_sec": round(bytes_sent_per_sec / (1024 * 1024), 4),
-                "mb_recv_per_sec": round(bytes_recv_per_sec / (1024 * 1024), 4),
+                "bytes_sent_per_sec": bytes_sent_per_sec,
+                "bytes_recv_per_sec": bytes_recv_per_sec,
+                "mb_sent_per_sec": round(bytes_sent_per_sec * _INV_MB, 4),
+                "mb_recv_per_sec": round(bytes_recv_per_sec * _INV_MB, 4),
                 "interface": self._net_interface,
             }
 
-            logger.debug(f"網路使用情況: {internet_usage}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("網路使用情況: %s", internet_usage)
             return internet_usage
 
         except Exception as e:
             logger.error(f"取得網路使用情況失敗: {e}")
-            return {
-                "bytes_sent_per_sec": 0.0,
-                "bytes_recv_per_sec": 0.0,
-                "mb_sent_per_sec": 0.0,
-                "mb_recv_per_sec": 0.0,
-                "interface": "unknown",
-            }
+            return _INTERNET_FALLBACK
 
-    def get_disk_usage(self, path: str = "C:\\") -> Dict[str, Union[float, int, str]]:
+    def get_disk_usage(
+        self, path: str = "C:\\"
+    ) -> Mapping[str, Union[float, int, str]]:
         """取得磁碟使用情況"""
+        now = time.monotonic()
+        entry = self._disk_cache.get(path)
+        if entry is not None and now < entry[0]:
+            return entry[1]
+
+        disk_info = self._raw_disk_usage(path)
+        self._disk_cache[path] = (now + DISK_TTL, disk_info)
+        return disk_info
+
+    def invalidate_disk(self, path: Optional[str] = None) -> None:
+        """
+        讓磁碟使用情況快取失效（例如大量寫入完成後）
+
+        Args:
+            path: 要失效的路徑，None 表示全部
+        """
+        if path is None:
+            self._disk_cache.clear()
+        else:
+            self._disk_cache.pop(path, None)
+
+    def _raw_disk_usage(self, path: str) -> Mapping[str, Union[float, int, str]]:
+        """取得磁碟使用情況（直接查詢 psutil）"""
         try:
             disk = psutil.disk_usage(path)
             disk_info = {
-                "total_gb": round(disk.total / (1024**3), 2),
-                "used_gb": round(disk.used / (1024**3), 2),
-                "free_gb": round(disk.free / (1024**3), 2),
+                "total_gb": round(disk.total * _INV_GB, 2),
+                "used_gb": round(disk.used * _INV_GB, 2),
+                "free_gb": round(disk.free * _INV_GB, 2),
                 "usage_percent": round((disk.used / disk.total) * 100, 2),
                 "path": path,
             }
-            logger.debug(f"磁碟使用情況 ({path}): {disk_info}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("磁碟使用情況 (%s): %s", path, disk_info)
             return disk_info
         except Exception as e:
             logger.error(f"取得磁碟使用情況失敗 ({path}): {e}")
-            return {
-                "total_gb": 0,
-                "used_gb": 0,
-                "free_gb": 0,
-                "usage_percent": 0,
-                "path": path,
-            }
+            return self._disk_fallback(path)
+
+    def _disk_fallback(self, path: str) -> Mapping[str, Union[float, int, str]]:
+        """取得指定路徑的唯讀磁碟預設值（每個路徑只建立一次）"""
+        fallback = self._disk_fallbacks.get(path)
+        if fallback is None:
+            fallback = self._disk_fallbacks[path] = MappingProxyType(
+                {**_DISK_FALLBACK, "path": path}
+            )
+        return fallback
 
-    def get_system_uptime(self) -> Dict[str, Union[int, float]]:
+    def get_system_uptime(self) -> Mapping[str, Union[int, float]]:
         """取得系統運行時間"""
+        return self._cached("uptime", UPTIME_TTL, self._raw_system_uptime)
+
+    def _raw_system_uptime(self) -> Mapping[str, Union[int, float]]:
+        """取得系統運行時間（格式化共用的快照）"""
         try:
-            boot_time = psutil.boot_time()
+            boot_time = self._snapshot().boot_time
             uptime_seconds = time.time() - boot_time
 
             uptime_info = {
-                "uptime_seconds": round(uptime_seconds, 2),
-                "uptime_minutes": round(uptime_seconds / 60, 2),
-                "uptime_hours": round(uptime_seconds / 3600, 2),
-                "uptime_days": round(uptime_seconds / 86400, 2),
+                "uptime_seconds": uptime_seconds,
+                "uptime_minutes": uptime_seconds * _INV_60,
+                "uptime_hours": round(uptime_seconds * _INV_3600, 2),
+                "uptime_days": uptime_seconds * _INV_86400,
                 "boot_time": boot_time,
             }
 
-            logger.debug(f"系統運行時間: {uptime_info}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("系統運行時間: %s", uptime_info)
             return uptime_info
 
         except Exception as e:
             logger.error(f"取得系統運行時間失敗: {e}")
-            return {
-                "uptime_seconds": 0,
-                "uptime_minutes": 0,
-                "uptime_hours": 0,
-                "uptime_days": 0,
-                "boot_time": 0,
-            }
+            return _UPTIME_FALLBACK
 
-    def get_battery_info(self) -> Dict[str, Union[float, bool, str]]:
+    def get_battery_info(self) -> Mapping[str, Union[float, bool, str]]:
         """取得電池資訊（如果有的話）"""
+        return self._cached("battery", BATTERY_TTL, self._raw_battery_info)
+
+    def _raw_battery_info(self) -> Mapping[str, Union[float, bool, str]]:
+        """取得電池資訊（直接查詢 psutil）"""
         try:
+            now = time.monotonic()
+            if self._has_battery is False and now < self._battery_reprobe_at:
+                return _BATTERY_FALLBACK
+
             battery = psutil.sensors_battery()
+            self._has_battery = battery is not None
             if battery is None:
-                return {
-                    "has_battery": False,
-                    "percent": 0.0,
-                    "power_plugged": False,
-                    "time_left": "N/A",
-                }
+                self._battery_reprobe_at = now + BATTERY_REPROBE_INTERVAL
+                return _BATTERY_FALLBACK
 
             time_left = (
                 "無限"
@@ -193,35 +437,84 @@ class SystemInfoCollector:
 
             battery_info = {
                 "has_battery": True,
-                "percent": round(battery.percent, 2),
+                "percent": battery.percent,
                 "power_plugged": battery.power_plugged,
                 "time_left": time_left,
             }
 
-            logger.debug(f"電池資訊: {battery_info}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("電池資訊: %s", battery_info)
             return battery_info
 
         except Exception as e:
             logger.error(f"取得電池資訊失敗: {e}")
-            return {
-                "has_battery": False,
-                "percent": 0.0,
-                "power_plugged": False,
-                "time_left": "N/A",
-            }
+            return _BATTERY_FALLBACK
+
+    def _collect_metrics(self) -> Dict[str, Any]:
+        """
+        平行收集各項系統資訊
+
+        每項資訊各自在執行緒池中取得，整體等待不超過 COLLECT_TIMEOUT；
+        逾時的項目（例如電池驅動程式卡住）沿用上次成功的結果，不會拖慢其他項目。
+        上一輪仍在執行的項目不重新送出，繼續等待原本的工作，避免卡住的工作越積越多。
+        """
+        with self._collect_lock:
+            for name, (fn, _) in self._metric_tasks.items():
+                future = self._pending_futures.get(name)
+                if future is None or future.done():
+                    self._pending_futures[name] = self._executor.submit(fn)
+            futures = dict(self._pending_futures)
+
+        # CPU 取樣不會阻塞，直接在目前執行緒取得
+        results: Dict[str, Any] = {"cpu_usage": self.get_cpu_usage()}
+
+        wait(futures.values(), timeout=COLLECT_TIMEOUT)
+        for name, future in futures.items():
+            if future.done() and future.exception() is None:
+                results[name] = self._last_results[name] = future.result()
+            else:
+                logger.warning(f"收集 {name} 資訊逾時或失敗，沿用上次的結果")
+                results[name] = self._last_results.get(
+                    name, self._metric_tasks[name][1]
+                )
+
+        return results
+
+    def close(self) -> None:
+        """停止收集用的執行緒池"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_snapshot(self) -> SystemSnapshot:
+        """取得單次收集的扁平系統資訊"""
+        metrics = self._collect_metrics()
+        memory = metrics["memory"]
+        internet = metrics["internet"]
+        disk = metrics["disk"]
+        battery = metrics["battery"]
+
+        snapshot = SystemSnapshot(
+            ts=time.time(),
+            cpu_pct=metrics["cpu_usage"],
+            mem_pct=memory["usage_percent"],
+            mem_used_gb=memory["used_gb"],
+            mem_total_gb=memory["total_gb"],
+            net_mb_sent_per_sec=internet["mb_sent_per_sec"],
+            net_mb_recv_per_sec=internet["mb_recv_per_sec"],
+            disk_pct=disk["usage_percent"],
+            disk_free_gb=disk["free_gb"],
+            uptime_hours=metrics["uptime"]["uptime_hours"],
+            has_battery=battery["has_battery"],
+            battery_pct=battery["percent"],
+            power_plugged=battery["power_plugged"],
+        )
+
+        logger.info("已收集完整系統資訊")
+        return snapshot
 
     def get_all_system_info(self) -> Dict[str, Any]:
         """取得所有系統資訊"""
         try:
-            system_info = {
-                "timestamp": time.time(),
-                "cpu_usage": self.get_cpu_usage(),
-                "memory": self.get_memory_usage(),
-                "internet": self.get_internet_usage(),
-                "disk": self.get_disk_usage(),
-                "uptime": self.get_system_uptime(),
-                "battery": self.get_battery_info(),
-            }
+            system_info = {"timestamp": time.time(), **self._collect_metrics()}
 
             logger.info("已收集完整系統資訊")
             return system_info
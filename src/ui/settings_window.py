@@ -2,13 +2,17 @@
 設定視窗模組 - 修復閃關問題版本
 """
 
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
+from __future__ import annotations
+
 import threading
 from pathlib import Path
-from typing import Callable, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
 from superyngo_logger import init_logger
 
+# tkinter 只在實際使用設定視窗時才載入
+if TYPE_CHECKING:
+    import tkinter as tk
+
 # 初始化日誌器
 logger = init_logger(app_name="system_monitor")
 
@@ -16,6 +20,9 @@ logger = init_logger(app_name="system_monitor")
 class SettingsWindow:
     """設定視窗"""
 
+    # 共用的隱藏根視窗，只建立一次，所有設定視窗都以 Toplevel 附掛在其下
+    _root_holder: Optional[tk.Tk] = None
+
     def __init__(
         self, settings, on_settings_changed: Optional[Callable] = None, parent=None
     ):
@@ -34,25 +41,49 @@ class SettingsWindow:
         self.window = None
         self.is_open = False
 
-        # 變數（延遲初始化）
+        # 變數（綁定在共用根視窗上，關閉後重新開啟時沿用）
         self.credentials_file_var = None
         self.spreadsheet_url_var = None
         self.worksheet_name_var = None
         self.interval_var = None
+
+        # 文字欄位（設定名稱 -> Entry），套用時一次讀取
+        self._entries: Dict[str, Any] = {}
         self.directories_listbox = None
 
+        # 測試連線用的客戶端，依 (憑證檔, 試算表 URL, 工作表名稱) 快取以沿用已授權的連線
+        self._client_cache: Dict[Tuple[str, str, str], Any] = {}
+
         logger.info("設定視窗初始化完成")
 
+    @classmethod
+    def _get_root(cls) -> tk.Tk:
+        """取得共用的隱藏根視窗（已有預設根視窗時直接使用）"""
+        import tkinter as tk
+
+        if cls._root_holder is None:
+            root = tk._default_root
+            if root is None:
+                root = tk.Tk()
+                root.withdraw()  # 隱藏根視窗
+            cls._root_holder = root
+        return cls._root_holder
+
     def _init_variables(self):
         """初始化 tkinter 變數"""
+        import tkinter as tk
+
         if self.credentials_file_var is None:
-            self.credentials_file_var = tk.StringVar()
-            self.spreadsheet_url_var = tk.StringVar()
-            self.worksheet_name_var = tk.StringVar()
-            self.interval_var = tk.IntVar()
+            root = self._get_root()
+            self.credentials_file_var = tk.StringVar(master=root)
+            self.spreadsheet_url_var = tk.StringVar(master=root)
+            self.worksheet_name_var = tk.StringVar(master=root)
+            self.interval_var = tk.IntVar(master=root)
 
     def show(self):
         """顯示設定視窗"""
+        from tkinter import messagebox
+
         if self.is_open:
             if self.window:
                 self.window.lift()
@@ -87,17 +118,14 @@ class SettingsWindow:
 
     def _create_window(self):
         """建立視窗"""
-        # 確保有根視窗
-        if not hasattr(tk, "_default_root") or not tk._default_root:
-            root = tk.Tk()
-            root.withdraw()  # 隱藏根視窗
-
-        # 創建新視窗
-        self.window = tk.Toplevel() if tk._default_root else tk.Tk()
+        import tkinter as tk
 
-        # 初始化 tkinter 變數
+        # 初始化 tkinter 變數（只在第一次開啟時建立）
         self._init_variables()
 
+        # 創建新視窗，附掛在共用根視窗下
+        self.window = tk.Toplevel(self._get_root())
+
         self.window.title("System Monitor - 設定")
         self.window.geometry("600x500")
         self.window.resizable(True, True)
@@ -131,6 +159,9 @@ class SettingsWindow:
 
     def _create_widgets(self):
         """建立介面元件"""
+        import tkinter as tk
+        from tkinter import ttk
+
         # 主框架
         main_frame = ttk.Frame(self.window, padding="10")
         main_frame.grid(row=0, column=0, sticky="nsew")
@@ -171,6 +202,9 @@ class SettingsWindow:
 
     def _create_sheets_tab(self, notebook):
         """建立 Google Sheets 設定頁"""
+        import tkinter as tk
+        from tkinter import ttk
+
         frame = ttk.Frame(notebook, padding="10")
         notebook.add(frame, text="Google Sheets")
 
@@ -183,7 +217,10 @@ class SettingsWindow:
         cred_frame.grid(row=1, column=0, sticky="ew", pady=(0, 10))
         cred_frame.columnconfigure(0, weight=1)
 
-        ttk.Entry(cred_frame, textvariable=self.credentials_file_var, width=50).grid(
+        self._entries["credentials_file"] = ttk.Entry(
+            cred_frame, textvariable=self.credentials_file_var, width=50
+        )
+        self._entries["credentials_file"].grid(
             row=0, column=0, sticky="ew", padx=(0, 5)
         )
         ttk.Button(cred_frame, text="瀏覽", command=self._browse_credentials_file).grid(
@@ -194,7 +231,10 @@ class SettingsWindow:
         ttk.Label(frame, text="試算表 URL:").grid(
             row=2, column=0, sticky=tk.W, pady=(0, 5)
         )
-        ttk.Entry(frame, textvariable=self.spreadsheet_url_var, width=70).grid(
+        self._entries["spreadsheet_url"] = ttk.Entry(
+            frame, textvariable=self.spreadsheet_url_var, width=70
+        )
+        self._entries["spreadsheet_url"].grid(
             row=3, column=0, sticky="ew", pady=(0, 10)
         )
 
@@ -202,9 +242,10 @@ class SettingsWindow:
         ttk.Label(frame, text="工作表名稱:").grid(
             row=4, column=0, sticky=tk.W, pady=(0, 5)
         )
-        ttk.Entry(frame, textvariable=self.worksheet_name_var, width=30).grid(
-            row=5, column=0, sticky=tk.W, pady=(0, 10)
+        self._entries["worksheet_name"] = ttk.Entry(
+            frame, textvariable=self.worksheet_name_var, width=30
         )
+        self._entries["worksheet_name"].grid(row=5, column=0, sticky=tk.W, pady=(0, 10))
 
         # 說明
         info_text = """設定說明：
@@ -221,6 +262,9 @@ class SettingsWindow:
 
     def _create_monitoring_tab(self, notebook):
         """建立監控設定頁"""
+        import tkinter as tk
+        from tkinter import ttk
+
         frame = ttk.Frame(notebook, padding="10")
         notebook.add(frame, text="監控設定")
 
@@ -282,6 +326,8 @@ class SettingsWindow:
 
     def _browse_credentials_file(self):
         """瀏覽憑證檔案"""
+        from tkinter import filedialog, messagebox
+
         try:
             filename = filedialog.askopenfilename(
                 title="選擇 Google Sheets 憑證檔案",
@@ -295,6 +341,9 @@ class SettingsWindow:
 
     def _add_directory(self):
         """新增監控目錄"""
+        import tkinter as tk
+        from tkinter import filedialog, messagebox
+
         try:
             directory = filedialog.askdirectory(title="選擇要監控的目錄")
             if directory:
@@ -305,6 +354,8 @@ class SettingsWindow:
 
     def _remove_directory(self):
         """移除監控目錄"""
+        from tkinter import messagebox
+
         try:
             selection = self.directories_listbox.curselection()
             if selection:
@@ -317,6 +368,8 @@ class SettingsWindow:
 
     def _load_current_settings(self):
         """載入目前設定"""
+        import tkinter as tk
+
         try:
             self.credentials_file_var.set(self.settings.credentials_file)
             self.spreadsheet_url_var.set(self.settings.spreadsheet_url)
@@ -325,45 +378,68 @@ class SettingsWindow:
 
             # 載入監控目錄
             self.directories_listbox.delete(0, tk.END)
-            for directory in self.settings.monitor_directories:
-                self.directories_listbox.insert(tk.END, directory)
+            directories = self.settings.monitor_directories
+            if directories:
+                self.directories_listbox.insert(tk.END, *directories)
 
         except Exception as e:
             logger.error(f"載入設定失敗: {e}")
 
     def _apply_settings(self):
         """套用設定"""
+        import tkinter as tk
+        from tkinter import messagebox
+
         try:
+            # 一次讀取所有文字欄位
+            new_values: Dict[str, Any] = {
+                key: entry.get().strip() for key, entry in self._entries.items()
+            }
+            new_values["interval_minutes"] = self.interval_var.get()
+            new_values["monitor_directories"] = tuple(
+                self.directories_listbox.get(0, tk.END)
+            )
+
             # 驗證輸入
-            if not self.credentials_file_var.get().strip():
+            if not new_values["credentials_file"]:
                 messagebox.showerror("錯誤", "請選擇憑證檔案")
                 return
 
-            if not self.spreadsheet_url_var.get().strip():
+            if not new_values["spreadsheet_url"]:
                 messagebox.showerror("錯誤", "請輸入試算表 URL")
                 return
 
-            if self.interval_var.get() < 1:
+            if new_values["interval_minutes"] < 1:
                 messagebox.showerror("錯誤", "監控間隔不能小於 1 分鐘")
                 return
 
-            # 儲存設定
-            self.settings.credentials_file = self.credentials_file_var.get().strip()
-            self.settings.spreadsheet_url = self.spreadsheet_url_var.get().strip()
-            self.settings.worksheet_name = (
-                self.worksheet_name_var.get().strip() or "System Monitor"
+            new_values["worksheet_name"] = (
+                new_values["worksheet_name"] or "System Monitor"
             )
-            self.settings.interval_minutes = self.interval_var.get()
 
-            # 儲存監控目錄
-            directories = []
-            for i in range(self.directories_listbox.size()):
-                directories.append(self.directories_listbox.get(i))
-            self.settings.monitor_directories = directories
+            # 與目前設定比較，只有實際變更時才通知重新初始化
+            current = self.settings.snapshot()
+            changed = any(
+                getattr(current, key) != value for key, value in new_values.items()
+            )
 
-            # 通知設定變更
-            if self.on_settings_changed:
-                self.on_settings_changed()
+            # 儲存設定
+            if changed:
+                with self.settings.batch():
+                    for key, value in new_values.items():
+                        if key == "monitor_directories":
+                            value = list(value)
+                        setattr(self.settings, key, value)
+
+                # 移除設定變更後已不再使用的測試連線客戶端
+                current_key = self._client_key()
+                for key in list(self._client_cache):
+                    if key != current_key:
+                        del self._client_cache[key]
+
+                # 通知設定變更
+                if self.on_settings_changed:
+                    self.on_settings_changed()
 
             messagebox.showinfo("成功", "設定已儲存")
             logger.info("設定已套用")
@@ -372,24 +448,34 @@ class SettingsWindow:
             logger.error(f"套用設定失敗: {e}")
             messagebox.showerror("錯誤", f"套用設定失敗: {e}")
 
+    def _client_key(self) -> Tuple[str, str, str]:
+        """目前設定對應的測試連線客戶端快取鍵"""
+        return (
+            self.settings.credentials_file,
+            self.settings.spreadsheet_url,
+            self.settings.worksheet_name,
+        )
+
     def _test_connection(self):
         """測試 Google Sheets 連線"""
+        from tkinter import messagebox
 
         def test_in_thread():
             try:
                 # 先套用設定
                 self._apply_settings()
 
-                # 測試連線
+                # 測試連線（相同設定重複測試時沿用同一個客戶端的憑證與 session，
+                # 但每次都實際向伺服器確認，不採用連線快取）
                 from ..api import GoogleSheetsClient
 
-                client = GoogleSheetsClient(
-                    self.settings.credentials_file,
-                    self.settings.spreadsheet_url,
-                    self.settings.worksheet_name,
-                )
+                key = self._client_key()
+                client = self._client_cache.get(key)
+                if client is None:
+                    client = GoogleSheetsClient(*key)
+                    self._client_cache[key] = client
 
-                result = client.test_connection()
+                result = client.test_connection(force=True)
 
                 # 在主執行緒中顯示結果
                 def show_result():
@@ -2,14 +2,18 @@
 系統托盤圖示模組
 """
 
-import pystray
-from PIL import Image
+from __future__ import annotations
+
 import threading
-import time
 from pathlib import Path
-from typing import Callable, Optional
+from typing import TYPE_CHECKING, Callable, Optional
 from superyngo_logger import init_logger
 
+# pystray 與 PIL 只在實際建立托盤圖示時才載入
+if TYPE_CHECKING:
+    import pystray
+    from PIL import Image
+
 # 初始化日誌器
 logger = init_logger(app_name="system_monitor")
 
@@ -21,6 +25,7 @@ class SystemTrayIcon:
         self,
         title: str = "System Monitor",
         icon_path: str = "assets/icon.ico",
+        icon_image: Optional[Image.Image] = None,
         on_settings_click: Optional[Callable] = None,
         on_toggle_monitoring: Optional[Callable] = None,
         on_exit_click: Optional[Callable] = None,
@@ -31,28 +36,42 @@ class SystemTrayIcon:
         Args:
             title: 托盤圖示標題
             icon_path: 圖示檔案路徑
+            icon_image: 已解碼的圖示圖片（提供時不再讀取 icon_path）
             on_settings_click: 設定按鈕點擊回調
             on_toggle_monitoring: 切換監控狀態回調
             on_exit_click: 退出按鈕點擊回調
         """
         self.title = title
         self.icon_path = Path(icon_path)
+        self._icon_image_cache = icon_image  # 已解碼的圖示，重新啟動時沿用
         self.on_settings_click = on_settings_click
         self.on_toggle_monitoring = on_toggle_monitoring
         self.on_exit_click = on_exit_click
 
         self.icon = None
         self.is_running = False
+        self._stop_event = threading.Event()  # 圖示停止時設定，供 wait_for_exit 等待
         self.is_monitoring = False
         self.last_status = "就緒"
+        self._last_built = None  # 上次建立選單時的 (is_monitoring, last_status)
 
         logger.info(f"系統托盤圖示初始化: {title}")
 
     def _load_icon_image(self) -> Image.Image:
-        """載入圖示圖片"""
+        """載入圖示圖片（只在第一次呼叫時讀取並解碼）"""
+        if self._icon_image_cache is None:
+            self._icon_image_cache = self._read_icon_image()
+        return self._icon_image_cache
+
+    def _read_icon_image(self) -> Image.Image:
+        """從檔案讀取圖示圖片"""
+        from PIL import Image
+
         try:
             if self.icon_path.exists():
-                return Image.open(self.icon_path)
+                image = Image.open(self.icon_path)
+                image.load()  # 立即解碼並關閉檔案
+                return image
             else:
                 # 如果找不到圖示，建立一個簡單的預設圖示
                 logger.warning(f"圖示檔案不存在: {self.icon_path}，使用預設圖示")
@@ -63,17 +82,28 @@ class SystemTrayIcon:
 
     def _create_default_icon(self) -> Image.Image:
         """建立預設圖示"""
+        from PIL import Image
+
         try:
-            # 建立一個簡單的 16x16 圖示
-            img = Image.new("RGBA", (16, 16), (0, 0, 0, 0))
-            # 畫一個簡單的矩形
-            for x in range(2, 14):
-                for y in range(2, 14):
-                    if x == 2 or x == 13 or y == 2 or y == 13:
-                        img.putpixel((x, y), (64, 128, 255, 255))
-                    elif 4 <= x <= 11 and 4 <= y <= 11:
-                        img.putpixel((x, y), (32, 32, 32, 255))
-            return img
+            # 建立一個簡單的 16x16 圖示：藍色外框內含深色方塊，
+            # 逐列組出 RGBA 位元組後一次建立圖片
+            clear = bytes(4)
+            blue = bytes((64, 128, 255, 255))
+            dark = bytes((32, 32, 32, 255))
+
+            empty_row = clear * 16
+            edge_row = clear * 2 + blue * 12 + clear * 2
+            side_row = clear * 2 + blue + clear * 10 + blue + clear * 2
+            inner_row = clear * 2 + blue + clear + dark * 8 + clear + blue + clear * 2
+
+            rows = (
+                [empty_row] * 2
+                + [edge_row, side_row]
+                + [inner_row] * 8
+                + [side_row, edge_row]
+                + [empty_row] * 2
+            )
+            return Image.frombytes("RGBA", (16, 16), b"".join(rows))
         except Exception as e:
             logger.error(f"建立預設圖示失敗: {e}")
             # 最後手段：建立純色圖示
@@ -111,6 +141,8 @@ class SystemTrayIcon:
 
     def _create_menu(self) -> pystray.Menu:
         """建立右鍵選單"""
+        import pystray
+
         monitoring_text = "停止監控" if self.is_monitoring else "開始監控"
 
         menu_items = [
@@ -132,6 +164,11 @@ class SystemTrayIcon:
         """更新選單"""
         try:
             if self.icon:
+                # 狀態未變更時不重建選單
+                current = (self.is_monitoring, self.last_status)
+                if current == self._last_built:
+                    return
+                self._last_built = current
                 self.icon.menu = self._create_menu()
                 self.icon.update_menu()
         except Exception as e:
@@ -143,11 +180,15 @@ class SystemTrayIcon:
             if self.is_running:
                 return
 
+            import pystray
+
             image = self._load_icon_image()
             menu = self._create_menu()
+            self._last_built = (self.is_monitoring, self.last_status)
 
             self.icon = pystray.Icon(self.title, image, menu=menu)
 
+            self._stop_event.clear()
             self.is_running = True
             logger.info("系統托盤圖示已啟動")
 
@@ -159,6 +200,7 @@ class SystemTrayIcon:
                     logger.error(f"托盤圖示運行失敗: {e}")
                 finally:
                     self.is_running = False
+                    self._stop_event.set()
 
             icon_thread = threading.Thread(target=run_icon, daemon=True)
             icon_thread.start()
@@ -173,6 +215,7 @@ class SystemTrayIcon:
             if self.icon and self.is_running:
                 self.icon.stop()
                 self.is_running = False
+                self._stop_event.set()
                 logger.info("系統托盤圖示已停止")
         except Exception as e:
             logger.error(f"停止托盤圖示失敗: {e}")
@@ -218,8 +261,10 @@ class SystemTrayIcon:
     def wait_for_exit(self):
         """等待圖示退出"""
         try:
-            while self.is_running:
-                time.sleep(0.1)
+            if self.is_running:
+                # 分段等待：Windows 上無逾時的 wait() 無法被 Ctrl+C 中斷
+                while not self._stop_event.wait(1.0):
+                    pass
         except KeyboardInterrupt:
             logger.info("接收到鍵盤中斷信號")
             self.stop()
@@ -8,75 +8,142 @@
 import os
 import sys
 import shutil
-from pathlib import Path
-from datetime import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 # 設置標準輸出編碼為 UTF-8，解決 GitHub Actions Windows 環境編碼問題
-if sys.platform == "win32":
-    os.environ["PYTHONIOENCODING"] = "utf-8"
+# （無法編碼的字元以替代字元輸出，不會中斷測試）
+sys.stdout.reconfigure(
+    encoding="utf-8", errors="replace", line_buffering=False, write_through=False
+)
+sys.stderr.reconfigure(encoding="utf-8", errors="replace")
+
+# 測試用到的路徑（以字串保存，直接交給 os.* 使用）
+DIST_DIR = "dist"
+EXE_PATH = os.path.join(DIST_DIR, "SystemMonitor.exe")
+RELEASE_DIR = "test_release"
+REQUIRED_FILES = (
+    ("config.example.json", "Config example"),
+    ("README.md", "Documentation"),
+)
+FILES_TO_COPY = (
+    ("dist/SystemMonitor.exe", "SystemMonitor.exe"),
+    ("config.example.json", "config.example.json"),
+    ("README.md", "README.md"),
+)
+
+# 日誌先累積在緩衝區，於每項測試結束時一次寫出
+_LOG_BUF = []
+# 平行執行的測試各自把日誌收集在自己執行緒的緩衝區，結束後再依序併入
+_capture = threading.local()
+# 固定格式的日誌行，預先取得 % 格式化函式
+_INFO_FMT = "[INFO] %s - %s\n".__mod__
+_ERROR_FMT = "[ERROR] %s - %s\n".__mod__
+# 報告中的分隔線
+_BAR = "=" * 50
+_BAR_NL = "\n" + _BAR
+
+
+def _flush():
+    """將緩衝區中的日誌一次寫出到標準輸出"""
+    sys.stdout.write("".join(_LOG_BUF))
+    _LOG_BUF.clear()
+    sys.stdout.flush()
+
+
+# 以秒為單位快取格式化後的時間戳記，同一秒內的日誌共用同一字串
+_last_sec = [0]
+_last_stamp = [""]
+# 預先綁定時間函式與格式，省去每次呼叫的模組屬性查找
+_time = time.time
+_strftime = time.strftime
+_localtime = time.localtime
+_TIMESTAMP_FMT = "%Y-%m-%d %H:%M:%S"
+
+
+def _timestamp():
+    """取得目前時間戳記字串（每秒只格式化一次）"""
+    now = int(_time())
+    if now != _last_sec[0]:
+        _last_stamp[0] = _strftime(_TIMESTAMP_FMT, _localtime(now))
+        _last_sec[0] = now
+    return _last_stamp[0]
 
 
 def log_info(message):
     """輸出信息日誌"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    try:
-        print(f"[INFO] {timestamp} - {message}")
-    except UnicodeEncodeError:
-        # 如果仍有編碼問題，使用英文替代
-        print(
-            f"[INFO] {timestamp} - {message.encode('ascii', 'replace').decode('ascii')}"
-        )
+    getattr(_capture, "buf", _LOG_BUF).append(_INFO_FMT((_timestamp(), message)))
 
 
 def log_error(message):
     """輸出錯誤日誌"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    try:
-        print(f"[ERROR] {timestamp} - {message}")
-    except UnicodeEncodeError:
-        # 如果仍有編碼問題，使用英文替代
-        print(
-            f"[ERROR] {timestamp} - {message.encode('ascii', 'replace').decode('ascii')}"
-        )
+    getattr(_capture, "buf", _LOG_BUF).append(_ERROR_FMT((_timestamp(), message)))
+
+
+@lru_cache(maxsize=64)
+def _cached_stat(path):
+    """
+    取得來源檔案的 stat 結果（整次執行期間快取）
+
+    測試過程中來源檔案不會變動，因此各階段重複檢查同一檔案時只需 stat 一次；
+    檔案不存在時拋出的 FileNotFoundError 不會被快取。
+    """
+    return os.stat(path)
 
 
 def check_file_exists(file_path, description="File"):
-    """檢查檔案是否存在"""
-    if os.path.exists(file_path):
-        size = os.path.getsize(file_path)
-        log_info(f"✅ {description} exists: {file_path} (size: {size} bytes)")
-        return True
-    else:
+    """檢查檔案是否存在（單次 stat 同時取得大小）"""
+    try:
+        size = _cached_stat(file_path).st_size
+    except FileNotFoundError:
         log_error(f"❌ {description} not found: {file_path}")
         return False
 
+    log_info(f"✅ {description} exists: {file_path} (size: {size} bytes)")
+    return True
+
+
+def _fast_rmtree(path):
+    """刪除目錄樹（以 scandir 的快取類型判斷，不另外 stat 每個項目）"""
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                _fast_rmtree(entry.path)
+            else:
+                os.unlink(entry.path)
+    os.rmdir(path)
+
 
 def test_dist_directory():
     """Test dist directory and executable"""
     log_info("Starting dist directory test...")
 
-    dist_path = Path("dist")
-    exe_path = dist_path / "SystemMonitor.exe"
-
-    # Check dist directory
-    if not dist_path.exists():
-        log_error("dist directory does not exist")
+    # Check executable (a missing dist directory is reported by the same stat)
+    if not check_file_exists(EXE_PATH, "SystemMonitor.exe"):
         return False
 
-    log_info(f"✅ dist directory exists: {dist_path.absolute()}")
-
-    # Check executable
-    if not check_file_exists(exe_path, "SystemMonitor.exe"):
-        return False
+    log_info(f"✅ dist directory exists: {os.path.abspath(DIST_DIR)}")
 
-    # Read and display fake executable content
-    try:
-        with open(exe_path, "r", encoding="utf-8") as f:
-            content = f.read()
-        log_info(f"Fake executable content:\n{content}")
-    except Exception as e:
-        log_error(f"Cannot read fake executable: {e}")
-        return False
+    # Read and display fake executable content (only when SYSMON_TEST_VERBOSE is set;
+    # the size has already been logged above)
+    if os.environ.get("SYSMON_TEST_VERBOSE"):
+        try:
+            fd = os.open(EXE_PATH, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+            try:
+                if hasattr(os, "posix_fadvise"):
+                    # Read once, front to back; no need to keep it in the page cache
+                    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_NOREUSE)
+                data = os.read(fd, _cached_stat(EXE_PATH).st_size)
+            finally:
+                os.close(fd)
+            content = data.decode("utf-8", "replace")
+            log_info(f"Fake executable content:\n{content}")
+        except Exception as e:
+            log_error(f"Cannot read fake executable: {e}")
+            return False
 
     return True
 
@@ -85,13 +152,8 @@ def test_required_files():
     """Test if required files exist"""
     log_info("Checking required files...")
 
-    required_files = [
-        ("config.example.json", "Config example"),
-        ("README.md", "Documentation"),
-    ]
-
     all_files_exist = True
-    for file_path, description in required_files:
+    for file_path, description in REQUIRED_FILES:
         if not check_file_exists(file_path, description):
             all_files_exist = False
 
@@ -103,39 +165,42 @@ def simulate_file_operations():
     log_info("Simulating file copy and packaging operations...")
 
     # Create test release directory
-    release_dir = Path("test_release")
-    if release_dir.exists():
-        shutil.rmtree(release_dir)
-
-    release_dir.mkdir()
-    log_info(f"✅ Created test directory: {release_dir.absolute()}")
-
-    # Simulate file copying
-    files_to_copy = [
-        ("dist/SystemMonitor.exe", "SystemMonitor.exe"),
-        ("config.example.json", "config.example.json"),
-        ("README.md", "README.md"),
-    ]
-
-    for src, dst in files_to_copy:
-        src_path = Path(src)
-        dst_path = release_dir / dst
-
-        if src_path.exists():
-            shutil.copy2(src_path, dst_path)
-            log_info(f"✅ Copied file: {src} -> {dst_path}")
-        else:
+    release_dir = RELEASE_DIR
+    try:
+        os.mkdir(release_dir)
+    except FileExistsError:
+        # Leftover from a previous run: recreate it only if it is not empty
+        with os.scandir(release_dir) as it:
+            leftover = any(True for _ in it)
+        if leftover:
+            _fast_rmtree(release_dir)
+            os.mkdir(release_dir)
+    log_info(f"✅ Created test directory: {os.path.abspath(release_dir)}")
+
+    # Simulate file copying: copy concurrently, then report in list order
+    # (the copy's own stat reports a missing source)
+    with ThreadPoolExecutor(max_workers=min(8, len(FILES_TO_COPY))) as executor:
+        copies = []
+        for src, dst in FILES_TO_COPY:
+            dst_path = os.path.join(release_dir, dst)
+            copies.append((src, dst_path, executor.submit(shutil.copy2, src, dst_path)))
+
+    for src, dst_path, future in copies:
+        try:
+            future.result()
+        except FileNotFoundError:
             log_error(f"❌ Source file not found: {src}")
             return False
+        log_info(f"✅ Copied file: {src} -> {dst_path}")
 
     # Check copy results
     log_info("Checking copy results:")
-    for item in release_dir.iterdir():
-        size = item.stat().st_size if item.is_file() else 0
-        log_info(f"  - {item.name} ({size} bytes)")
+    for _, dst_path, _ in copies:
+        size = os.stat(dst_path).st_size
+        log_info(f"  - {os.path.basename(dst_path)} ({size} bytes)")
 
     # Clean up test directory
-    shutil.rmtree(release_dir)
+    _fast_rmtree(release_dir)
     log_info(f"✅ Cleaned up test directory: {release_dir}")
 
     return True
@@ -146,45 +211,85 @@ def test_environment():
     log_info("Test environment information:")
     log_info(f"  - Python version: {sys.version}")
     log_info(f"  - Operating system: {os.name}")
-    log_info(f"  - Current working directory: {os.getcwd()}")
+    if hasattr(sys.stdout, "buffer"):
+        # Write the raw cwd bytes directly, skipping the decode/encode round trip
+        _flush()
+        sys.stdout.buffer.write(
+            b"[INFO] %s -   - Current working directory: %s\n"
+            % (_timestamp().encode(), os.getcwdb())
+        )
+    else:
+        log_info(f"  - Current working directory: {os.getcwd()}")
     log_info(f"  - Script path: {__file__}")
 
 
+def _run_test(test_func):
+    """
+    執行單項測試並收集其日誌
+
+    回傳 (結果, 例外, 日誌行)，日誌行由呼叫端依測試順序寫入緩衝區，
+    因此平行執行的測試輸出不會交錯。
+    """
+    _capture.buf = lines = []
+    try:
+        return test_func(), None, lines
+    except Exception as e:
+        return False, e, lines
+    finally:
+        del _capture.buf
+
+
+def _report_test(test_name, result, error, lines):
+    """輸出單項測試的日誌與結果，回傳是否通過"""
+    log_info(f"\n--- {test_name} ---")
+    _LOG_BUF.extend(lines)
+    passed = error is None and bool(result)
+    if error is not None:
+        log_error(f"❌ {test_name} exception: {error}")
+    elif passed:
+        log_info(f"✅ {test_name} passed")
+    else:
+        log_error(f"❌ {test_name} failed")
+    _flush()
+    return passed
+
+
 def main():
     """Main function"""
-    log_info("=" * 50)
+    log_info(_BAR)
     log_info("Starting release process test")
-    log_info("=" * 50)
+    log_info(_BAR)
 
     # Test environment
     test_environment()
+    _flush()
 
-    # Execute tests
-    tests = [
+    # Execute tests: the checks touch disjoint files and run concurrently;
+    # the copy simulation runs afterwards
+    independent_tests = [
         ("Test dist directory and executable", test_dist_directory),
         ("Test required files", test_required_files),
-        ("Simulate file operations", simulate_file_operations),
     ]
-
-    all_passed = True
-    for test_name, test_func in tests:
-        log_info(f"\n--- {test_name} ---")
-        try:
-            result = test_func()
-            if result:
-                log_info(f"✅ {test_name} passed")
-            else:
-                log_error(f"❌ {test_name} failed")
-                all_passed = False
-        except Exception as e:
-            log_error(f"❌ {test_name} exception: {e}")
-            all_passed = False  # Summary
-    log_info("\n" + "=" * 50)
+    with ThreadPoolExecutor(max_workers=len(independent_tests)) as executor:
+        futures = [
+            (test_name, executor.submit(_run_test, test_func))
+            for test_name, test_func in independent_tests
+        ]
+    outcomes = [(test_name, *future.result()) for test_name, future in futures]
+    outcomes.append(("Simulate file operations", *_run_test(simulate_file_operations)))
+
+    # Report every test (no short-circuit: all results are shown)
+    all_passed = all([_report_test(*outcome) for outcome in outcomes])
+
+    # Summary
+    log_info(_BAR_NL)
     if all_passed:
         log_info("🎉 All tests passed! Release process is ready.")
+        _flush()
         sys.exit(0)
     else:
         log_error("❌ Some tests failed, please check the errors above.")
+        _flush()
         sys.exit(1)
 
 